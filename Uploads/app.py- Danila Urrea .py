@@ -1,17 +1,19 @@
 import streamlit as st
-import pandas as pd
-from exchange_rate_tracker import generate_fake_historical_data
+from exchange_rate_tracker import CACHE_TTL_SECONDS, generate_fake_historical_data
 
 st.set_page_config(page_title="Currency Exchange Rate Tracker", layout="centered")
 
 st.title("💱 Currency Exchange Rate Tracker")
 
-# Generate data
-df_cop = generate_fake_historical_data('COP')
-df_eur = generate_fake_historical_data('EUR')
 
-# Merge data
-df = pd.merge(df_cop, df_eur, on='Date')
+# One API call for both currencies, reused across reruns until the TTL expires
+@st.cache_data(ttl=CACHE_TTL_SECONDS)
+def load_data(currencies):
+    return generate_fake_historical_data(list(currencies))
+
+
+# Generate data
+df = load_data(('COP', 'EUR'))
 
 st.subheader("📊 Last 10 Days of USD to COP and USD to EUR")
 st.dataframe(df)
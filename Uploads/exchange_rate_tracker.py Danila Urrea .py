@@ -1,44 +1,102 @@
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
 import requests
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime
 
-def get_usd_exchange_rate(target_currency: str):
-    url = f'https://open.er-api.com/v6/latest/USD'
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        return data['rates'].get(target_currency)
+# FX_OPEN_ER_API_URL points this at a stand-in, e.g. the replay stub server (see replay.py)
+API_URL = os.environ.get('FX_OPEN_ER_API_URL', 'https://open.er-api.com/v6/latest').rstrip('/') + '/USD'
+# open.er-api only updates once a day, so there is no point asking more often than this
+CACHE_TTL_SECONDS = 60 * 60
+
+_session = requests.Session()
+_lock = threading.Lock()
+_cached = {'rates': None, 'fetched_at': 0.0}
+_in_flight = None
+
+
+def get_usd_exchange_rates(target_currencies, ttl: float = CACHE_TTL_SECONDS):
+    """
+    Look up several currencies against USD with at most one HTTP call.
+
+    The whole /latest/USD document is fetched once and kept for `ttl` seconds;
+    callers that arrive while a fetch is running wait for that fetch instead of
+    starting their own. Returns {currency: rate or None}, or None if the API failed.
+    """
+    global _in_flight
+    with _lock:
+        if _cached['rates'] is not None and time.monotonic() - _cached['fetched_at'] < ttl:
+            rates = _cached['rates']
+            return {code: rates.get(code) for code in target_currencies}
+        owner = _in_flight is None
+        if owner:
+            _in_flight = Future()
+        pending = _in_flight
+
+    if owner:
+        rates = None
+        try:
+            response = _session.get(API_URL, timeout=10)
+            if response.status_code == 200:
+                rates = response.json()['rates']
+                with _lock:
+                    _cached['rates'] = rates
+                    _cached['fetched_at'] = time.monotonic()
+            else:
+                print("Error fetching data:", response.status_code)
+        except requests.exceptions.RequestException as e:
+            print("Error fetching data:", e)
+        finally:
+            with _lock:
+                _in_flight = None
+            pending.set_result(rates)
     else:
-        print("Error fetching data:", response.status_code)
+        rates = pending.result()
+
+    if rates is None:
         return None
+    return {code: rates.get(code) for code in target_currencies}
+
+
+def get_usd_exchange_rate(target_currency: str):
+    rates = get_usd_exchange_rates([target_currency])
+    return rates.get(target_currency) if rates else None
 
-def generate_fake_historical_data(currency_code: str, days: int = 10):
+
+def generate_fake_historical_data(currency_codes, days: int = 10, seed=None, base_rates=None,
+                                  daily_volatility: float = 0.01):
     """
-    Since the free API does not support historical data, we'll simulate the last 10 days
-    by applying small random variations around today’s rate.
+    Since the free API does not support historical data, we'll simulate the last `days` days
+    as a geometric random walk that ends at today's rate.
+
+    Accepts one currency code or a list of them and returns one DataFrame with a
+    `USD to XXX` column each. Everything is drawn in a single NumPy call, so
+    millions of rows across many currencies are cheap; pass `seed` for
+    reproducible data and `base_rates` ({code: rate}) to skip the API entirely.
     """
-    import random
-    today_rate = get_usd_exchange_rate(currency_code)
-    if today_rate is None:
+    if isinstance(currency_codes, str):
+        currency_codes = [currency_codes]
+    today_rates = base_rates if base_rates is not None else get_usd_exchange_rates(currency_codes)
+    if today_rates is None:
         return pd.DataFrame()
+    codes = [code for code in currency_codes if today_rates.get(code) is not None]
+    levels = np.array([today_rates[code] for code in codes], dtype=np.float64)
 
-    dates = [datetime.now() - timedelta(days=i) for i in range(days)]
-    dates.reverse()  # Oldest first
-
-    rates = [round(today_rate + random.uniform(-0.02, 0.02) * today_rate, 4) for _ in dates]
-
-    return pd.DataFrame({
-        'Date': [d.strftime('%Y-%m-%d') for d in dates],
-        f'USD to {currency_code}': rates
-    })
+    rng = np.random.default_rng(seed)
+    log_path = np.cumsum(rng.standard_normal((days, len(codes))) * daily_volatility, axis=0)
+    rates = levels * np.exp(log_path - log_path[-1])  # Oldest first, last row is today's rate
 
-# Generate data for both currencies
-df_cop = generate_fake_historical_data('COP')
-df_eur = generate_fake_historical_data('EUR')
+    dates = pd.date_range(end=pd.Timestamp(datetime.now().date()), periods=days)
+    data = pd.DataFrame(np.round(rates, 4), columns=[f'USD to {code}' for code in codes])
+    data.insert(0, 'Date', dates.strftime('%Y-%m-%d'))
+    return data
 
-# Merge both into one DataFrame
-df_merged = pd.merge(df_cop, df_eur, on='Date')
-print(df_merged)
 
-    
-    
\ No newline at end of file
+if __name__ == '__main__':
+    # Generate data for both currencies with one API call
+    df_merged = generate_fake_historical_data(['COP', 'EUR'])
+    print(df_merged)
@@ -0,0 +1,155 @@
+"""Vectorized rate analytics over a (days x symbols) float matrix.
+
+Every statistic is computed for all symbols at once in a single pass over a
+contiguous float64 array:
+
+* daily log returns,
+* annualized rolling volatility for any number of windows, from running sums
+  of returns and squared returns (a window is two subtractions, not a loop),
+* drawdown from the running peak,
+* period returns (1W / 1M / YTD / 1Y) by binary search on the date index.
+
+``Analytics.extend`` appends newly published days and only computes the new
+rows: the running sums, running peak and last price carry the state forward,
+so a daily refresh costs O(new days x symbols) instead of the full history.
+"""
+import numpy as np
+import pandas as pd
+
+from rate_matrix import RateMatrix, day_ordinals
+
+TRADING_DAYS_PER_YEAR = 252
+
+PERIODS = {
+    '1W': pd.DateOffset(weeks=1),
+    '1M': pd.DateOffset(months=1),
+    'YTD': None,
+    '1Y': pd.DateOffset(years=1),
+}
+
+
+def log_returns(values, previous=None):
+    """Daily log returns; the first row is NaN unless the ``previous`` price row is given."""
+    logs = np.log(values)
+    first = np.full((1, values.shape[1]), np.nan) if previous is None else np.log(previous)[np.newaxis, :]
+    return np.diff(logs, axis=0, prepend=first)
+
+
+def drawdowns(values, peak=None):
+    """Fractional drawdown from the running peak (0 at a new high, negative below it)."""
+    if peak is not None:
+        values = np.vstack([peak[np.newaxis, :], values])
+    running_peak = np.fmax.accumulate(values, axis=0)
+    result = values / running_peak - 1
+    return (result[1:], running_peak[-1]) if peak is not None else (result, running_peak[-1])
+
+
+def _running_sums(returns, previous=None):
+    """Cumulative count, sum and sum of squares of the valid returns, per symbol."""
+    valid = ~np.isnan(returns)
+    clean = np.where(valid, returns, 0.0)
+    sums = np.stack([valid.astype(np.float64), clean, clean * clean])
+    sums = np.cumsum(sums, axis=1)
+    if previous is not None:
+        sums += previous[:, np.newaxis, :]
+    return sums
+
+
+def _rolling_volatility(sums, window, lead=None):
+    """Annualized rolling std of returns from their running sums.
+
+    ``lead`` holds the running sums of the (up to ``window``) rows right
+    before ``sums``, so an appended block can look back across the boundary;
+    a lead shorter than the window means the history starts inside it.
+    """
+    if lead is None:
+        lead = np.zeros((3, 0, sums.shape[2]))
+    missing = window - lead.shape[1]
+    if missing > 0:
+        # Rows before the history starts: zero sums just before it, undefined further back
+        pad = np.full((3, missing, sums.shape[2]), np.nan)
+        pad[:, -1, :] = 0.0
+        lead = np.concatenate([pad, lead], axis=1)
+    padded = np.concatenate([lead, sums], axis=1)
+    count, total, total_sq = padded[:, window:, :] - padded[:, :-window, :]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (total_sq - total * total / count) / (count - 1)
+        volatility = np.sqrt(np.clip(variance, 0, None) * TRADING_DAYS_PER_YEAR)
+        volatility[~(count >= window)] = np.nan
+    return volatility
+
+
+def period_returns(dates, values, periods=PERIODS):
+    """Percent change from the last close on or before each period start to the latest row."""
+    dates = pd.DatetimeIndex(dates)
+    latest = dates[-1]
+    labels, rows = [], []
+    for label, offset in periods.items():
+        start = pd.Timestamp(latest.year - 1, 12, 31) if offset is None else latest - offset
+        row = dates.searchsorted(start, side='right') - 1
+        labels.append(label)
+        rows.append(max(row, 0))
+    change = (values[-1][np.newaxis, :] / values[rows] - 1) * 100
+    return change, labels
+
+
+class Analytics:
+    """Log returns, rolling volatility, drawdowns and period returns for every symbol."""
+
+    # Part of the shared-cache key; bump when the pickled attributes change
+    FORMAT = 2
+
+    def __init__(self, dates, values, symbols, windows=(21,)):
+        self.symbols = list(symbols)
+        self.windows = tuple(windows)
+        self.dates = pd.DatetimeIndex(dates)
+        self.days = day_ordinals(self.dates)
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.returns = log_returns(self.values)
+        self._sums = _running_sums(self.returns)
+        self.volatility = {window: _rolling_volatility(self._sums, window) for window in self.windows}
+        self.drawdown, self._peak = drawdowns(self.values)
+        self._period_returns, self.period_labels = period_returns(self.dates, self.values)
+
+    def extend(self, dates, values):
+        """Return a new Analytics with ``dates``/``values`` appended, computing only the new rows."""
+        values = np.ascontiguousarray(values, dtype=np.float64)
+        new = object.__new__(Analytics)
+        new.symbols, new.windows = self.symbols, self.windows
+        new.dates = self.dates.append(pd.DatetimeIndex(dates))
+        new.days = np.concatenate([self.days, day_ordinals(dates)])
+        new.values = np.concatenate([self.values, values])
+
+        returns = log_returns(values, previous=self.values[-1])
+        sums = _running_sums(returns, previous=self._sums[:, -1, :])
+        new.returns = np.concatenate([self.returns, returns])
+        new._sums = np.concatenate([self._sums, sums], axis=1)
+        new.volatility = {}
+        for window in self.windows:
+            tail = _rolling_volatility(sums, window, lead=self._sums[:, -window:, :])
+            new.volatility[window] = np.concatenate([self.volatility[window], tail])
+        drawdown, new._peak = drawdowns(values, peak=self._peak)
+        new.drawdown = np.concatenate([self.drawdown, drawdown])
+        # Period returns only need the latest row and a few binary searches
+        new._period_returns, new.period_labels = period_returns(new.dates, new.values)
+        return new
+
+    def can_extend(self, dates, symbols, values):
+        """True when ``dates``/``values`` continue this history for the same symbols.
+
+        Stored days can be rewritten (a provisional rate confirmed by the primary
+        provider, a backfill merged over them), so the known rows are compared too.
+        """
+        dates = pd.DatetimeIndex(dates)
+        known = len(self.dates)
+        return (list(symbols) == self.symbols and len(dates) >= known
+                and dates[:known].equals(self.dates)
+                and np.array_equal(values[:known], self.values, equal_nan=True))
+
+    def period_returns(self):
+        """Frame of percent changes, one row per period label and one column per symbol."""
+        return pd.DataFrame(self._period_returns, index=self.period_labels, columns=self.symbols)
+
+    def volatility_matrix(self, window, start_row=0):
+        """Annualized rolling volatility of every symbol from ``start_row`` on, as a view."""
+        return RateMatrix(self.days[start_row:], self.volatility[window][start_row:], self.symbols)
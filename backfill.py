@@ -0,0 +1,163 @@
+"""Backfill the local rate store with a long history window.
+
+The range is split into year-sized chunks that are fetched concurrently by a
+bounded worker pool. Each chunk is staged to ``<store>/backfill-chunks/`` as
+it arrives, so memory holds at most ``--workers`` chunks rather than the
+whole payload, and recorded in ``<store>/backfill.json``. Once every chunk is
+in, the staged ones are merged into the store as a single new snapshot (see
+``RateStore.merge_blocks``) and removed. Re-running the same command after an
+interruption only fetches what is still missing, and merges what an earlier
+run staged.
+
+    python backfill.py --years 20 --symbols KRW,AUD,EUR,JPY --workers 4
+"""
+import argparse
+import json
+import os
+import tempfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import date, timedelta
+
+import pandas as pd
+
+from config import load_config
+from providers import ProviderError, build_providers
+from rate_store import RateStore
+
+# ECB reference rates (and so Frankfurter) start here
+EARLIEST_DATE = date(1999, 1, 4)
+
+
+def year_chunks(start, end):
+    """Split ``start..end`` into consecutive ranges of at most one calendar year."""
+    chunks = []
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(date(chunk_start.year, 12, 31), end)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+class Checkpoint:
+    """Chunks already merged into the store for a given base and symbol set."""
+
+    def __init__(self, store, symbols):
+        self.path = os.path.join(store.path, 'backfill.json')
+        self.key = f"{store.base}:{','.join(sorted(symbols))}"
+        self.done = set()
+        if os.path.exists(self.path):
+            with open(self.path) as handle:
+                self.done = set(json.load(handle).get(self.key, []))
+
+    @staticmethod
+    def label(chunk):
+        return f'{chunk[0]}..{chunk[1]}'
+
+    def is_done(self, chunk):
+        return self.label(chunk) in self.done
+
+    def mark_done(self, chunk):
+        self.done.add(self.label(chunk))
+        state = {}
+        if os.path.exists(self.path):
+            with open(self.path) as handle:
+                state = json.load(handle)
+        state[self.key] = sorted(self.done)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix='.tmp-')
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(state, handle, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class Staging:
+    """Fetched chunks kept on disk until they are merged into the store together."""
+
+    def __init__(self, store):
+        self.path = os.path.join(store.path, 'backfill-chunks')
+        os.makedirs(self.path, exist_ok=True)
+
+    def paths(self):
+        return sorted(os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.pkl'))
+
+    def add(self, chunk, rates):
+        path = os.path.join(self.path, f'{chunk[0]}_{chunk[1]}.pkl')
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.tmp-')
+        os.close(fd)
+        rates.to_pickle(tmp_path)
+        os.replace(tmp_path, path)
+
+    def merge_into(self, store):
+        """Merge every staged chunk into ``store`` as one snapshot; returns how many there were."""
+        paths = self.paths()
+        store.merge_blocks([lambda path=path: pd.read_pickle(path) for path in paths])
+        for path in paths:
+            os.remove(path)
+        return len(paths)
+
+
+def backfill(config, start, end, workers=4):
+    store = RateStore(config['store_path'], base=config['base'])
+    # Sized so all `workers` chunks really are fetched at once
+    providers = build_providers(config, concurrency=workers)
+    symbols = config['symbols']
+    os.makedirs(store.path, exist_ok=True)
+    checkpoint = Checkpoint(store, symbols)
+    staging = Staging(store)
+
+    pending = [chunk for chunk in year_chunks(start, end) if not checkpoint.is_done(chunk)]
+    print(f"Backfilling {len(pending)} chunk(s) of {','.join(symbols)} into {store.path}")
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backfill') as pool:
+        in_flight = {}
+        while pending or in_flight:
+            # Keep at most `workers` chunks in memory: submit only as results are consumed
+            while pending and len(in_flight) < workers:
+                chunk = pending.pop(0)
+                future = pool.submit(providers.fetch_range, chunk[0], chunk[1], config['base'], symbols)
+                in_flight[future] = chunk
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                chunk = in_flight.pop(future)
+                try:
+                    rates = future.result()
+                except ProviderError as e:
+                    failed.append(chunk)
+                    print(f"  {Checkpoint.label(chunk)}: failed ({e})")
+                    continue
+                if not rates.empty:
+                    staging.add(chunk, rates)
+                # The current year is still growing, so it is never recorded as finished
+                if chunk[1] < date.today():
+                    checkpoint.mark_done(chunk)
+                print(f"  {Checkpoint.label(chunk)}: {len(rates)} day(s)")
+    merged = staging.merge_into(store)
+    print(f"Merged {merged} chunk(s) into {store.path}")
+    return failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Backfill the local rate store in year-sized chunks.')
+    parser.add_argument('--years', type=int, default=20, help='history length to backfill (default 20)')
+    parser.add_argument('--start', type=date.fromisoformat, help='first day (overrides --years)')
+    parser.add_argument('--end', type=date.fromisoformat, default=date.today(), help='last day (default today)')
+    parser.add_argument('--symbols', help='comma-separated symbols (default: the dashboard symbols)')
+    parser.add_argument('--store', help='rate store directory')
+    parser.add_argument('--workers', type=int, default=4, help='concurrent chunk downloads (default 4)')
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    if args.symbols:
+        overrides['symbols'] = [symbol.strip().upper() for symbol in args.symbols.split(',') if symbol.strip()]
+    if args.store:
+        overrides['store_path'] = args.store
+    config = load_config(overrides)
+
+    start = args.start or date(args.end.year - args.years, args.end.month, 1)
+    failed = backfill(config, max(start, EARLIEST_DATE), args.end, workers=args.workers)
+    if failed:
+        raise SystemExit(f"{len(failed)} chunk(s) failed; re-run the same command to resume")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,188 @@
+"""Benchmark harness for start-up, data loading, analytics and chart callbacks.
+
+Everything runs against the seeded synthetic provider, so timings measure
+this code and not the network. Each benchmark runs for every dataset size in
+the grid (years of history x number of currencies):
+
+    python benchmarks/run_benchmarks.py                     # full 2y/10y/20y x 11/50/150 grid
+    python benchmarks/run_benchmarks.py --quick             # 2y x 11 and 20y x 150 only
+    python benchmarks/run_benchmarks.py --save-baseline     # write benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --compare           # fail if >25% slower than the baseline
+
+Baselines are machine-specific: save one on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from config import load_config  # noqa: E402
+from providers import _frame_from_rates  # noqa: E402
+from rate_data import DataManager, build_analytics  # noqa: E402
+from rate_parser import stream_rates  # noqa: E402
+from rate_store import RateStore  # noqa: E402
+from synthetic import synthetic_rates, synthetic_symbols  # noqa: E402
+
+BASELINE_PATH = os.path.join(ROOT, 'benchmarks', 'baseline.json')
+YEARS = (2, 10, 20)
+CURRENCIES = (11, 50, 150)
+QUICK_GRID = ((2, 11), (20, 150))
+
+
+def measure(fn, repeat=5, setup=None):
+    """Median and best wall time of ``fn()`` in seconds over ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return {'median': statistics.median(timings), 'best': min(timings)}
+
+
+def app_config(store_path, years, symbols):
+    return {
+        'providers': ['synthetic'],
+        'symbols': symbols,
+        'history_days': 365 * years,
+        'store_path': store_path,
+        'warm_up': False,
+        'refresh_interval': 0,
+        'cache_url': '',
+        # Timed separately below; the cold chart should measure a build
+        'prebuild_workers': 0,
+    }
+
+
+def bench_startup(code):
+    """Cold start of ``code`` in a fresh interpreter."""
+    return measure(lambda: subprocess.run([sys.executable, '-c', code], cwd=ROOT, check=True), repeat=3)
+
+
+def bench_size(years, n_currencies, workdir):
+    symbols = synthetic_symbols(n_currencies)
+    end = date.today()
+    start = date(end.year - years, end.month, 1)
+    frame = synthetic_rates(start, end, symbols, seed=1)
+    results = {}
+
+    # API JSON -> DataFrame, on a Frankfurter-shaped payload
+    payload = json.dumps({'rates': {
+        day.strftime('%Y-%m-%d'): dict(zip(symbols, row))
+        for day, row in zip(frame['Date'], frame[symbols].itertuples(index=False))
+    }})
+    results['json_to_frame'] = measure(lambda: _frame_from_rates(json.loads(payload)['rates'], symbols))
+    chunks = [payload[i:i + 64 * 1024] for i in range(0, len(payload), 64 * 1024)]
+    results['json_stream_to_frame'] = measure(lambda: stream_rates(chunks, symbols, start, end))
+
+    # Storage: write one snapshot, then time loading it
+    store_path = os.path.join(workdir, f'store-{years}y-{n_currencies}')
+    store = RateStore(store_path)
+    store.update(lambda s, e: frame, start, end)
+    results['store_load'] = measure(store.load)
+
+    # Analytics (percentage change and volatility) over the whole history
+    stored = store.load_matrix()
+    results['analytics'] = measure(lambda: build_analytics(stored, [21, 63]))
+
+    # Data layer load and the line-chart callback, cold (figure built) and warm (cached)
+    config = load_config(app_config(store_path, years, symbols))
+    results['dataset_load'] = measure(lambda: DataManager(config).get(), repeat=3)
+
+    import currency_exchange_final_project as dashboard
+    app = dashboard.create_app(app_config(store_path, years, symbols))
+    app.data_manager.get()
+    client = app.server.test_client()
+    request = {
+        'output': 'line-chart.figure',
+        'outputs': {'id': 'line-chart', 'property': 'figure'},
+        'inputs': [
+            {'id': 'currency-dropdown', 'property': 'value', 'value': symbols[0]},
+            {'id': 'base-dropdown', 'property': 'value', 'value': 'USD'},
+            {'id': 'range-selector', 'property': 'value', 'value': 'MAX'},
+            {'id': 'custom-range', 'property': 'start_date', 'value': None},
+            {'id': 'custom-range', 'property': 'end_date', 'value': None},
+            {'id': 'line-chart', 'property': 'relayoutData', 'value': None},
+        ],
+        'changedPropIds': ['currency-dropdown.value'],
+    }
+
+    def update_chart():
+        response = client.post('/_dash-update-component', json=request)
+        assert response.status_code == 200, response.status_code
+
+    results['update_chart_cold'] = measure(update_chart, setup=app.figure_cache.clear)
+    results['update_chart_warm'] = measure(update_chart, repeat=20)
+
+    # Every chart of a version as the app builds it, and on the warmed process pool
+    from figure_cache import FigureCache
+    from prebuild import prebuild
+    prebuild_config = load_config({**app_config(store_path, years, symbols), 'prebuild_workers': 2})
+    pool_config = {**prebuild_config, 'prebuild_pool_min_tasks': 0}
+    dataset = app.data_manager.get()
+    results['prebuild'] = measure(
+        lambda: prebuild(dataset, prebuild_config, FigureCache(len(symbols) + 2)), repeat=3)
+    prebuild(dataset, pool_config, FigureCache(len(symbols) + 2))  # start the pool
+    results['prebuild_pool'] = measure(
+        lambda: prebuild(dataset, pool_config, FigureCache(len(symbols) + 2)), repeat=3)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for key, timing in results.items():
+        if key in baseline and timing['median'] > baseline[key]['median'] * (1 + tolerance):
+            regressions.append(f"{key}: {baseline[key]['median'] * 1000:.1f} ms -> {timing['median'] * 1000:.1f} ms")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the dashboard benchmarks.')
+    parser.add_argument('--quick', action='store_true', help='only the smallest and largest dataset')
+    parser.add_argument('--save-baseline', action='store_true', help=f'write results to {BASELINE_PATH}')
+    parser.add_argument('--compare', action='store_true', help='compare against the saved baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed slowdown (default 0.25)')
+    args = parser.parse_args(argv)
+
+    grid = QUICK_GRID if args.quick else [(years, n) for years in YEARS for n in CURRENCIES]
+    workdir = tempfile.mkdtemp(prefix='fx-bench-')
+    results = {
+        # The dashboard (Dash app built on first access to ``server``) and the batch CLI
+        'startup': bench_startup('import currency_exchange_final_project as m; m.server'),
+        'startup_cli': bench_startup('import fx_report'),
+    }
+    try:
+        for years, n_currencies in grid:
+            for name, timing in bench_size(years, n_currencies, workdir).items():
+                results[f'{name}[{years}y x {n_currencies}]'] = timing
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    width = max(len(key) for key in results)
+    for key, timing in results.items():
+        print(f"{key:<{width}}  median {timing['median'] * 1000:9.2f} ms   best {timing['best'] * 1000:9.2f} ms")
+
+    if args.save_baseline:
+        with open(BASELINE_PATH, 'w') as handle:
+            json.dump(results, handle, indent=2, sort_keys=True)
+        print(f'Baseline written to {BASELINE_PATH}')
+    if args.compare:
+        with open(BASELINE_PATH) as handle:
+            regressions = compare(results, json.load(handle), args.tolerance)
+        if regressions:
+            raise SystemExit('Regressions:\n  ' + '\n  '.join(regressions))
+        print('No regressions against the baseline.')
+
+
+if __name__ == '__main__':
+    main()
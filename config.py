@@ -0,0 +1,92 @@
+import os
+
+# Defaults for the dashboard and its data layer; every key can be overridden by
+# passing a dict to create_app() or with an FX_<KEY> environment variable.
+DEFAULT_CONFIG = {
+    'base': 'USD',
+    'symbols': ['KRW', 'AUD', 'CAD', 'PLN', 'MXN', 'EUR', 'INR', 'CNY', 'HKD', 'THB', 'SGD'],
+    # Days fetched on first start; the charts can show anything the store holds
+    'history_days': 365 * 2,
+    'store_path': 'rate_store',
+    # Rate providers in priority order: frankfurter, open_er_api, file, synthetic
+    'providers': ['frankfurter', 'open_er_api'],
+    'frankfurter_url': 'https://api.frankfurter.app',
+    'open_er_api_url': 'https://open.er-api.com/v6/latest',
+    # Local Date,<symbols> CSV or Frankfurter-style JSON used by the 'file' provider
+    'fixture_path': '',
+    # Seed of the 'synthetic' provider's random walk (load tests and benchmarks)
+    'synthetic_seed': 0,
+    # Record/replay of the HTTP providers (see replay.py): with replay_dir set, 'record'
+    # saves every upstream response there and 'replay' serves them back offline, with
+    # replay_latency_ms added per request and a seeded replay_failure_rate share failing
+    # with replay_failure_status (0 drops the connection instead)
+    'replay_dir': '',
+    'replay_mode': 'replay',
+    'replay_latency_ms': 0,
+    'replay_failure_rate': 0.0,
+    'replay_failure_status': 503,
+    'replay_seed': 0,
+    # Per-request timeout (seconds) and retry budget for upstream calls
+    'fetch_timeout': 10,
+    'fetch_retries': 3,
+    'warm_up': True,
+    # Seconds between polls for newly published rates; 0 disables the refresher
+    'refresh_interval': 15 * 60,
+    # Rolling volatility windows in trading days; the dashboard charts the first one
+    'volatility_windows': [21, 63],
+    # Time range the charts open on: 1M, 6M, 1Y, 5Y or MAX
+    'default_range': '1Y',
+    # Rows per page of the rates table (paged on the server)
+    'table_page_size': 15,
+    # Upper bound on points sent to the browser per chart trace
+    'max_points_per_trace': 2000,
+    # Largest batch accepted by POST /api/convert (see conversion.py)
+    'convert_max_rows': 200_000,
+    # Cache-Control max-age (seconds) for the layout; ETags make revalidation cheap
+    'http_max_age': 0,
+    # Serialized figures kept per worker (keyed by chart, currency and data version);
+    # keep it above len(symbols) + 2 so a prebuilt version fits
+    'figure_cache_size': 64,
+    # Processes that rebuild every chart of a new data version before it goes live
+    # (see prebuild.py); 0 builds them on demand instead. Fewer line charts than
+    # prebuild_pool_min_tasks are built in process: with 2y x 11 symbols a warm pool
+    # took 0.85-0.94 s against 0.90 s in process even on one CPU, so it only has to
+    # beat the one-off ~1.3 s start-up, which is paid once per process and off the
+    # request path. prebuild_timeout is in seconds
+    'prebuild_workers': 2,
+    'prebuild_pool_min_tasks': 8,
+    'prebuild_timeout': 300,
+    # Cache shared by all workers: '' (off), sqlite:///path/to/cache.db or redis://host:6379/0
+    'cache_url': '',
+    'cache_max_bytes': 256 * 1024 * 1024,
+    # cProfile dumps (.prof) go to profile_dir. profile_header lets a request ask for one
+    # with 'X-Profile: 1'; profile_slow_ms > 0 profiles a sample of requests and keeps
+    # only those slower than that
+    'profile_dir': 'profiles',
+    'profile_header': False,
+    'profile_slow_ms': 0,
+    'profile_sample_rate': 0.1,
+}
+
+
+def _from_env(key, default):
+    raw = os.environ.get(f'FX_{key.upper()}')
+    if raw is None:
+        return default
+    if isinstance(default, bool):
+        return raw.strip().lower() in ('1', 'true', 'yes', 'on')
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, float):
+        return float(raw)
+    if isinstance(default, list):
+        cast = type(default[0]) if default else str
+        return [cast(item.strip()) for item in raw.split(',') if item.strip()]
+    return raw
+
+
+def load_config(overrides=None):
+    """Return DEFAULT_CONFIG with environment variables and ``overrides`` applied."""
+    config = {key: _from_env(key, default) for key, default in DEFAULT_CONFIG.items()}
+    config.update(overrides or {})
+    return config
@@ -0,0 +1,267 @@
+"""Bulk conversion of amounts at historical dates: ``POST /api/convert``.
+
+Each row is a (date, currency, amount) triple converted to ``to`` (a column
+of its own, or one ``to`` for the whole request; the base currency by
+default) at the rate of that date. Weekends, holidays and any other day
+without a stored rate use the last stored day on or before it (an as-of
+join). The rate rows of a whole batch come from one ``np.searchsorted``
+over the sorted day ordinals and the rates from one gather, so a batch costs
+a handful of array operations however many rows it has.
+
+Requests are JSON or CSV, and the response has the same shape:
+
+* ``{"to": "EUR", "rows": [{"date": "2024-03-02", "currency": "JPY", "amount": 1200}, ...]}``
+  -- each row comes back with ``rate_date``, ``rate`` and ``converted`` added
+  (other keys, such as an invoice id, are kept),
+* ``{"to": "EUR", "date": [...], "currency": [...], "amount": [...]}`` -- the
+  same as columns, the cheapest to parse and build,
+* CSV with a ``date,currency,amount[,to]`` header (``Content-Type: text/csv``).
+
+Rows that cannot be converted get nulls and an ``error``; the rest of the
+batch is still converted.
+"""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+from metrics import Counter
+
+try:
+    from orjson import dumps as _dumps, loads as _loads
+except ImportError:  # optional; the standard library is several times slower on large batches
+    _loads = json.loads
+
+    def _dumps(obj):
+        return json.dumps(obj).encode()
+
+CONVERSIONS = Counter('fx_conversions_total', 'Rows converted by /api/convert', ['result'])
+
+# Column code of the base currency (a column of ones) and of an unknown currency
+_BASE = -1
+_UNKNOWN = -2
+
+
+class ConversionError(ValueError):
+    """Raised for a request body that cannot be read as a batch."""
+
+
+def _parse_dates(dates):
+    try:
+        return np.asarray(dates, dtype='datetime64[D]')
+    except (TypeError, ValueError):
+        # Some are not ISO dates; let pandas try each and flag the failures as NaT
+        return pd.to_datetime(pd.Series(dates, dtype=object), errors='coerce').to_numpy('datetime64[D]')
+
+
+def _ordinals(dates):
+    """Day ordinals of ``dates`` and a mask of the ones that could be parsed."""
+    if isinstance(dates, np.ndarray) and dates.dtype.kind == 'M':
+        days = dates.astype('datetime64[D]')
+    else:
+        # A batch repeats a few thousand dates at most: parse each distinct one once
+        codes, uniques = pd.factorize(pd.Series(dates, dtype=object))
+        days = np.append(_parse_dates(uniques.to_numpy()), np.datetime64('NaT', 'D'))[codes]
+    valid = ~np.isnat(days)
+    return np.where(valid, days.astype(np.int64), 0), valid
+
+
+def _amounts(amounts):
+    try:
+        return np.asarray(amounts, dtype=np.float64)
+    except (TypeError, ValueError):
+        return pd.to_numeric(pd.Series(amounts, dtype=object), errors='coerce').to_numpy(np.float64)
+
+
+def _column_codes(rates, currencies, usd_base):
+    """Column of each currency in ``rates``, ``_BASE`` or ``_UNKNOWN``; looked up once per distinct code."""
+    codes, uniques = pd.factorize(pd.Series(currencies, dtype=object))
+    lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+    for i, currency in enumerate(uniques):
+        currency = str(currency).strip().upper()
+        lookup[i] = _BASE if currency == usd_base else rates.columns.get(currency, _UNKNOWN)
+    lookup[-1] = _UNKNOWN  # factorize codes missing values as -1
+    return lookup[codes]
+
+
+def _usd_rates(rates, rows, columns):
+    """``currency per 1 usd_base`` at each (row, column); 1 for the base, NaN for unknown."""
+    values = rates.values[rows, np.maximum(columns, 0)]
+    values[columns == _BASE] = 1.0
+    values[columns == _UNKNOWN] = np.nan
+    return values
+
+
+def convert(rates, dates, currencies, amounts, to, usd_base='USD'):
+    """Convert every row at the rate of its date (as of the last stored day on or before it).
+
+    ``rates`` is the ``usd_base`` RateMatrix; ``to`` is one currency or one per row.
+    Returns equally long arrays: ``rate_date`` (day ordinals), ``rate``,
+    ``converted`` and ``error`` (None where the row converted).
+    """
+    ordinals, dated = _ordinals(dates)
+    amounts = _amounts(amounts)
+    source = _column_codes(rates, currencies, usd_base)
+    if isinstance(to, str):
+        target = np.full(len(source), _column_codes(rates, [to], usd_base)[0])
+    else:
+        target = _column_codes(rates, to, usd_base)
+    if not (len(ordinals) == len(amounts) == len(source) == len(target)):
+        raise ConversionError("date, currency, amount and to must have the same length")
+
+    # As-of join: the last stored day on or before each date
+    rows = np.searchsorted(rates.days, ordinals, side='right') - 1
+    stored = dated & (rows >= 0)
+    rows = np.where(stored, rows, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rate = _usd_rates(rates, rows, target) / _usd_rates(rates, rows, source)
+        converted = amounts * rate
+
+    # The most basic problem of a row is the one reported, so later checks win
+    checks = (
+        (np.isnan(rate), 'no rate stored for this currency and date'),
+        (np.isnan(amounts), 'invalid amount'),
+        ((target == _UNKNOWN) | (source == _UNKNOWN), 'unknown currency'),
+        (dated & ~stored, f'before the first stored day ({rates.first_date})'),
+        (~dated, 'invalid date'),
+    )
+    error = np.full(len(rate), None, dtype=object)
+    failed = np.zeros(len(rate), dtype=bool)
+    for mask, message in checks:
+        error[mask] = message
+        failed |= mask
+    rate[failed] = np.nan
+    converted[failed] = np.nan
+    rate_date = np.where(stored, rates.days[rows], -1)
+
+    n_failed = int(failed.sum())
+    CONVERSIONS.inc(len(rate) - n_failed, result='ok')
+    if n_failed:
+        CONVERSIONS.inc(n_failed, result='error')
+    return {'rate_date': rate_date, 'rate': rate, 'converted': converted, 'error': error}
+
+
+def _date_strings(ordinals):
+    """ISO strings of day ordinals (None for -1), formatting each distinct day once."""
+    unique, inverse = np.unique(ordinals, return_inverse=True)
+    text = unique.astype('datetime64[D]').astype(str).astype(object)
+    text[unique < 0] = None
+    return text[inverse]
+
+
+def _json_values(result):
+    """Columns of a ``convert`` result as JSON-ready lists (NaN and missing dates as null)."""
+    columns = {'rate_date': _date_strings(result['rate_date']).tolist()}
+    for name in ('rate', 'converted'):
+        columns[name] = [None if v != v else v for v in result[name].tolist()]
+    columns['error'] = result['error'].tolist()
+    return columns
+
+
+def _batch_size(body):
+    """Rows in a parsed JSON request, checking that the rows or columns are lists."""
+    if isinstance(body, list):
+        return len(body)
+    if not isinstance(body, dict):
+        raise ConversionError("expected a JSON object or a list of rows")
+    if 'rows' in body:
+        names = ['rows']
+    else:
+        names = [name for name in ('date', 'currency', 'amount') if name in body]
+        if isinstance(body.get('to'), list):
+            names.append('to')
+    for name in names:
+        if not isinstance(body[name], list):
+            raise ConversionError(f"{name!r} must be a list")
+    return max((len(body[name]) for name in names), default=0)
+
+
+def convert_json(body, rates, default_to, usd_base='USD'):
+    """Answer a parsed JSON request (rows or columns) in the same shape."""
+    _batch_size(body)
+    if isinstance(body, list):
+        body = {'rows': body}
+    to = body.get('to') or default_to
+
+    rows = body.get('rows')
+    if rows is not None:
+        if not all(isinstance(row, dict) for row in rows):
+            raise ConversionError("every row must be an object")
+        targets = [row.get('to') or to for row in rows] if any('to' in row for row in rows) else to
+        result = convert(rates, [row.get('date') for row in rows], [row.get('currency') for row in rows],
+                         [row.get('amount') for row in rows], targets, usd_base)
+        columns = _json_values(result)
+        names = list(columns)
+        return {'to': to, 'rows': [{**row, **dict(zip(names, values))}
+                                   for row, values in zip(rows, zip(*columns.values()))]}
+
+    try:
+        dates, currencies, amounts = body['date'], body['currency'], body['amount']
+    except KeyError as e:
+        raise ConversionError(f"missing column {e.args[0]!r}; send 'rows' or date/currency/amount columns")
+    targets = body['to'] if isinstance(body.get('to'), list) else to
+    result = convert(rates, dates, currencies, amounts, targets, usd_base)
+    return {'to': targets if isinstance(targets, str) else None, **_json_values(result)}
+
+
+def convert_csv(text, rates, default_to, usd_base='USD'):
+    """Answer a CSV request: the input columns plus rate_date, rate, converted and error."""
+    try:
+        frame = pd.read_csv(io.StringIO(text), dtype={'date': str, 'currency': str, 'to': str})
+    except (ValueError, pd.errors.ParserError) as e:
+        raise ConversionError(f"unreadable CSV: {e}")
+    missing = [name for name in ('date', 'currency', 'amount') if name not in frame.columns]
+    if missing:
+        raise ConversionError(f"missing CSV column(s): {', '.join(missing)}")
+    to = frame['to'].fillna(default_to).to_numpy() if 'to' in frame.columns else default_to
+    result = convert(rates, frame['date'].to_numpy(), frame['currency'].to_numpy(),
+                     frame['amount'].to_numpy(), to, usd_base)
+    frame['rate_date'] = _date_strings(result['rate_date'])
+    frame['rate'] = result['rate']
+    frame['converted'] = result['converted']
+    frame['error'] = result['error']
+    return frame.to_csv(index=False)
+
+
+def install(server, config, data_manager):
+    """Register ``POST /api/convert`` on a Flask ``server``."""
+    from flask import Response, request
+
+    from rate_data import DataUnavailable
+
+    max_rows = config['convert_max_rows']
+
+    @server.route('/api/convert', methods=['POST'])
+    def convert_endpoint():
+        if not data_manager.ready:
+            data_manager.warm_up()
+            if config['warm_up']:
+                return {'error': data_manager.error or 'rates are still loading'}, 503, {'Retry-After': '1'}
+        try:
+            data = data_manager.get()
+        except DataUnavailable as e:
+            return {'error': str(e)}, 503
+
+        default_to = request.args.get('to') or config['base']
+        body = request.get_data()
+        try:
+            if request.mimetype == 'text/csv':
+                if body.count(b'\n') > max_rows + 1:
+                    return {'error': f'at most {max_rows} rows per request'}, 413
+                try:
+                    text = body.decode()
+                except UnicodeDecodeError as e:
+                    raise ConversionError(f"CSV must be UTF-8: {e}")
+                return Response(convert_csv(text, data.rates, default_to, data.cross.usd_base),
+                                mimetype='text/csv')
+            try:
+                parsed = _loads(body)
+            except ValueError as e:
+                raise ConversionError(f"invalid JSON: {e}")
+            if _batch_size(parsed) > max_rows:
+                return {'error': f'at most {max_rows} rows per request'}, 413
+            payload = convert_json(parsed, data.rates, default_to, data.cross.usd_base)
+        except ConversionError as e:
+            return {'error': str(e)}, 400
+        return Response(_dumps(payload), mimetype='application/json')
@@ -0,0 +1,74 @@
+"""Cross rates for any base/quote pair, derived from the stored USD-based matrix.
+
+The store only holds ``symbol per 1 USD``. Treating USD itself as a column of
+ones, the rate of ``quote`` per 1 ``base`` on a day is ``usd[quote] / usd[base]``,
+so one pair is a single vector division, a whole rebased history is one
+broadcast division and a full N x N cross table for a day is one outer
+division, without another API download.
+"""
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from rate_matrix import RateMatrix
+
+
+def cross_table(usd_row, currencies):
+    """N x N frame whose ``[base, quote]`` cell is the rate of ``quote`` per 1 ``base``."""
+    usd_row = np.asarray(usd_row, dtype=np.float64)
+    return pd.DataFrame(usd_row[np.newaxis, :] / usd_row[:, np.newaxis],
+                        index=pd.Index(currencies, name='base'), columns=currencies)
+
+
+class CrossRateEngine:
+    def __init__(self, rates, usd_base='USD', version=None, maxsize=8):
+        # ``rates`` is the USD-based RateMatrix; it is used as is, not copied
+        self.rates = rates
+        self.usd_base = usd_base
+        self.currencies = [usd_base, *rates.symbols]
+        self.version = version
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _usd_column(self, currency, rows=slice(None)):
+        if currency == self.usd_base:
+            return np.ones(len(self.rates.days[rows]))
+        return self.rates.column(currency)[rows]
+
+    def pair(self, base, quote, rows=None):
+        """One-column RateMatrix of ``quote`` per 1 ``base``, named after ``quote``.
+
+        With a ``rows`` slice only those days are divided.
+        """
+        if rows is None:
+            values = self._usd_column(quote) / self._usd_column(base)
+            return self.rates.with_values(values[:, np.newaxis], [quote])
+        values = self._usd_column(quote, rows) / self._usd_column(base, rows)
+        return RateMatrix(self.rates.days[rows], values[:, np.newaxis], [quote])
+
+    def rebased(self, base):
+        """RateMatrix of every currency quoted per 1 ``base``, cached per (base, version)."""
+        key = (base, self.version)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        divisor = self._usd_column(base)[:, np.newaxis]
+        values = np.empty((len(self.rates), len(self.currencies)), order='F')
+        values[:, :1] = 1 / divisor
+        np.divide(self.rates.values, divisor, out=values[:, 1:])
+        matrix = self.rates.with_values(values, self.currencies)
+
+        with self._lock:
+            self._cache[key] = matrix
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return matrix
+
+    def cross_table(self, row=-1):
+        """Full N x N cross table for one day (the latest by default)."""
+        return cross_table(np.concatenate([[1.0], self.rates.values[row]]), self.currencies)
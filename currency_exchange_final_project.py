@@ -1,300 +1,483 @@
-import os
-import requests
-import pandas as pd
-from datetime import date, timedelta
-from dash import Dash, dcc, html, Input, Output, dash_table
-import plotly.express as px
-
-
-# Define time range
-end_date = date.today()
-start_date = end_date - timedelta(days=365 * 2)
-today = date.today().strftime('%Y-%m-%d')
-
-# Base currency and symbols
-base = 'USD'
-symbols = 'KRW,AUD,CAD,PLN,MXN,EUR,INR,CNY,HKD,THB,SGD'
-
-# Currency full names
-currency_names = {
-    'KRW': 'KRW - South Korean Won',
-    'AUD': 'AUD - Australian Dollar',
-    'CAD': 'CAD - Canadian Dollar',
-    'PLN': 'PLN - Polish Zloty',
-    'MXN': 'MXN - Mexican Peso',
-    'EUR': 'EUR - Euro',
-    'INR': 'INR - Indian Rupee',
-    'CNY': 'CNY - Chinese Yuan',
-    'HKD': 'HKD - Hong Kong Dollar',
-    'THB': 'THB - Thai Baht',
-    'SGD': 'SGD - Singapore Dollar',
-    'USD': 'USD - US Dollar'
-}
-
-# Frankfurter API URL
-url = f"https://api.frankfurter.app/{start_date}..{end_date}?from={base}&to={symbols}"
-
-# Data file name
-data_file = 'frankfurter_exchange_rates.csv'
-
-# Check if data file exists; if not, fetch it
-# Always fetch new data
-try:
-    response = requests.get(url)
-    response.raise_for_status()
-    data = response.json()
-    df = pd.DataFrame(data['rates']).T
-    df.index.name = 'Date'
-    df.reset_index(inplace=True)
-    df.to_csv(data_file, index=False)  # overwrite with fresh data
-except requests.exceptions.RequestException as e:
-    raise SystemExit(f"Failed to fetch data: {e}")
-
-# Load the data
-df = pd.read_csv(data_file)
-df['Date'] = pd.to_datetime(df['Date'])
-df = df.sort_values('Date')
-df.rename(columns={'Date': 'Week_start'}, inplace=True)
-latest_date_in_data = df['Week_start'].max().strftime('%Y-%m-%d')
-# Print outputs
-print(f'Display Data:\n{df.head()}')
-print(f'Statistical Summary:\n{df.describe()}')
-print(f'Checking Null Values:\n{df.isnull().sum()}')
-
-# ---------------------------- Dashboard Build ---------------------------- #
-
-# Initialize Dash app
-app = Dash(__name__)
-server = app.server
-
-# Pick default dropdown currency dynamically
-default_currency = df.columns[1] if len(df.columns) > 1 else None
-
-# Pre-calculate data for additional graphs
-latest_rates = df.iloc[-1].drop('Week_start')
-first_rates = df.iloc[0].drop('Week_start')
-percentage_change = ((latest_rates - first_rates) / first_rates) * 100
-
-# Calculate volatility
-volatility = df.drop('Week_start', axis=1).rolling(window=4).std()
-volatility['Week_start'] = df['Week_start']
-
-# App layout
-app.layout = html.Div([
-
-    # Section 1: Title + Dropdown + Input + Line Chart
-    html.Div([
-        html.H2("Currency Exchange Rates vs USD", style={
-            'textAlign': 'center',
-            'color': 'Black',
-            'fontSize': '32px',
-            'fontWeight': 'bold',
-            'fontFamily': 'Arial Black',
-            'marginTop': '20px'
-        }),
-        html.H4(f"Current Date: {latest_date_in_data}", style={'textAlign': 'center'}),
-        dcc.Dropdown(
-            options=[{'label': currency_names.get(col, col), 'value': col} for col in df.columns if col != 'Week_start'],
-            value=default_currency,
-            id='currency-dropdown',
-            style={   #Cute Dropdown Styling
-                'borderRadius': '8px',
-                'padding': '8px',
-                'boxShadow': '0px 2px 6px rgba(0,0,0,0.1)',
-                'backgroundColor': 'white',
-                'marginBottom': '20px'
-            }
-        ),
-        html.Label("USD Amount:", style={'fontWeight': 'bold'}),
-        dcc.Input(
-            id='usd-input',
-            type='number',
-            value=1,
-            style={   # Optional: make input also a little cuter
-                'width': '150px',
-                'padding': '10px',
-                'borderRadius': '8px',
-                'border': '1px solid lightgray',
-                'marginBottom': '20px'
-            }
-        ),
-        html.Div(id='converted-value'),
-        dcc.Graph(id='line-chart', style={'width': '80%', 'margin': 'auto'})
-    ], style={
-        'width': '80%',
-        'margin': 'auto',
-        'backgroundColor': 'white',
-        'padding': '20px',
-        'borderRadius': '10px',
-        'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
-        'marginBottom': '30px'
-    }),
-
-    # Section 2: Table + Bar Chart Side by Side
-    html.Div([
-        html.Div([
-            html.H3("Latest Exchange Rates (vs USD)", style={
-                'textAlign': 'center',
-                'color': 'black',
-                'fontSize': '20px',
-                'fontWeight': 'bold',
-                'fontFamily': 'Arial Black',
-                'marginBottom': '10px'
-            }),
-            dash_table.DataTable(
-                id='latest-rates-table',
-                columns=[
-                    {'name': 'Currency', 'id': 'Currency'},
-                    {'name': 'Rate vs USD', 'id': 'Rate'}
-                ],
-                data=[
-                    {'Currency': currency_names.get(cur, cur), 'Rate': f"{val:,.4f}"}
-                    for cur, val in latest_rates.items()
-                ],
-                filter_action='native',
-                sort_action='native',
-                sort_mode='multi',
-                style_table={
-                    'width': '100%',
-                    'height': '500px',
-                    'overflowY': 'auto',
-                    'overflowX': 'auto'
-                },
-                style_cell={
-                    'textAlign': 'center',
-                    'fontSize': 16,
-                    'fontFamily': 'Arial',
-                    'padding': '10px',
-                    'transition': 'background-color 0.3s ease'  # Smooth transition
-                },
-                style_header={
-                    'backgroundColor': 'lightgrey',
-                    'fontWeight': 'bold',
-                    'fontFamily': 'Arial Black',
-                    'textAlign': 'center'
-                },
-                style_data_conditional=[    # Cute Pastel Hover
-                    {
-                        'if': {'state': 'active'},
-                        'backgroundColor': '#e6e6ff',  # light pastel purple
-                        'border': '1px solid #d3d3d3'
-                    },
-                    {'if': {'column_id': 'Currency'}, 'width': '70%', 'textAlign': 'left'},
-                    {'if': {'column_id': 'Rate'}, 'width': '30%', 'textAlign': 'center'}
-                ]
-            )
-        ], style={
-            'flex': '1',
-            'backgroundColor': 'white',
-            'padding': '20px',
-            'borderRadius': '10px',
-            'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
-            'marginRight': '15px',
-            'marginBottom': '30px'
-        }),
-
-        html.Div([
-            html.H3("1-Year % Change vs USD", style={
-                'textAlign': 'center',
-                'color': 'black',
-                'fontSize': '20px',
-                'fontWeight': 'bold',
-                'fontFamily': 'Arial Black',
-                'marginBottom': '10px'
-            }),
-            dcc.Graph(
-                id='bar-change',
-                figure=px.bar(
-                    x=percentage_change.index,
-                    y=percentage_change.values,
-                    labels={'x': 'Currency', 'y': '% Change'},
-                    title=''
-                ).update_layout(
-                    title_font=dict(size=20, family='Arial Black', color='black'),
-                    title_x=0.5
-                )
-            )
-        ], style={
-            'flex': '1',
-            'backgroundColor': 'white',
-            'padding': '20px',
-            'borderRadius': '10px',
-            'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
-            'marginBottom': '30px'
-        })
-    ], style={
-        'width': '80%',
-        'margin': 'auto',
-        'paddingTop': '50px',
-        'display': 'flex',
-        'justifyContent': 'space-between',
-        'flexWrap': 'wrap'
-    }),
-
-    # Section 3: Volatility Line Chart
-    html.Div([
-        html.H3("Currency Volatility (Weekly Std Dev)", style={
-            'textAlign': 'center',
-            'color': 'black',
-            'fontSize': '20px',
-            'fontWeight': 'bold',
-            'fontFamily': 'Arial Black',
-            'marginBottom': '20px'
-        }),
-        dcc.Graph(
-            id='volatility-line',
-            figure=px.line(
-                volatility,
-                x=volatility.index,
-                y=volatility.columns.drop('Week_start'),
-                labels={'value': 'Volatility', 'variable': 'Currency'},
-                title=''
-            ).update_layout(
-                title_font=dict(size=20, family='Arial Black', color='black'),
-                title_x=0.5
-            )
-        )
-    ], style={
-        'width': '80%',
-        'margin': 'auto',
-        'backgroundColor': 'white',
-        'padding': '20px',
-        'borderRadius': '10px',
-        'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
-        'marginBottom': '30px'
-    })
-
-], style={
-    'backgroundColor': '#f5f7fa',
-    'minHeight': '100vh',
-    'padding': '30px'
-})
-
-# Callback
-@app.callback(
-    Output('line-chart', 'figure'),
-    Output('converted-value', 'children'),
-    Input('currency-dropdown', 'value'),
-    Input('usd-input', 'value')
-)
-def update_chart(currency, amount):
-    full_currency_name = currency_names.get(currency, currency)
-    fig = px.line(
-        df,
-        x='Week_start',
-        y=currency,
-        title=f"{full_currency_name} per 1 {currency_names.get(base, base)}",
-        labels={'Week_start': 'Week Start (Monday)', currency: full_currency_name}
-    )
-    fig.update_layout(
-        xaxis_range=[df['Week_start'].min(), df['Week_start'].max()],
-        title_font=dict(size=20, family='Arial Black', color='black'),
-        title_x=0.5
-    )
-
-    latest_rate = df[currency].iloc[-1]
-    converted = amount * latest_rate
-    return fig, f"{amount:,.2f} USD = {converted:,.2f} {currency} (latest)"
-
-if __name__ == '__main__':
-    app.run(debug=True, use_reloader=False)
+import sys
+import threading
+
+import pandas as pd
+
+from config import load_config
+from conversion import install as install_conversion
+from currency_names import currency_names
+from downsample import narrow_window, visible_range
+from figure_cache import FigureCache
+from http_cache import install as install_http_cache
+from metrics import install as install_metrics
+from rate_matrix import RANGES
+from rate_table import date_table, history_table, table_page
+from rate_data import DataManager, summarize
+from shared_cache import make_shared_cache
+
+
+# ---------------------------- Dashboard Build ---------------------------- #
+
+def create_app(config=None):
+    """Build the Dash app without loading any data.
+
+    The rates are fetched on first use, or on a background thread started by the
+    first incoming request when ``warm_up`` is enabled, so importing this
+    module and forking gunicorn workers stays cheap. A refresher thread then
+    swaps in new data as it is published. ``/healthz`` answers immediately,
+    whether or not the data has loaded yet, and reports the data version;
+    ``/metrics`` serves latency, payload and cache statistics (see metrics.py)
+    and ``POST /api/convert`` converts batches at historical dates (see
+    conversion.py).
+    """
+    # Dash and Plotly are only imported once a UI is actually built (see __getattr__ below)
+    from dash import Dash, ctx, dcc, html, Input, Output, dash_table, no_update
+    from dash.dash_table.Format import Format, Group, Scheme
+    from figures import (bar_change_figure, bar_change_key, line_chart, line_chart_key,
+                         volatility_chart, volatility_key)
+    from prebuild import prebuild
+
+    config = load_config(config)
+    shared_cache = make_shared_cache(config)
+    figure_cache = FigureCache(config['figure_cache_size'], shared=shared_cache)
+
+    # Every chart of a new data version is built ahead of the first request for it
+    def prebuild_charts(dataset):
+        prebuild(dataset, config, figure_cache, shared_cache)
+
+    data_manager = DataManager(config, shared_cache,
+                               prepare=prebuild_charts if config['prebuild_workers'] else None)
+
+    # Initialize Dash app; the layout is dynamic, so callback ids are not all present up front
+    app = Dash(__name__, suppress_callback_exceptions=True)
+    app.data_manager = data_manager
+    app.figure_cache = figure_cache
+    server = app.server
+
+    # Background threads start on the first request, i.e. inside each forked worker
+    @server.before_request
+    def start_background_threads():
+        if config['warm_up']:
+            data_manager.warm_up()
+        data_manager.start_refresher()
+
+    # /metrics, callback latency and payload size, optional profiling. Registered before the
+    # HTTP cache so it sees every request and measures responses after compression
+    install_metrics(server, config, data_manager, callbacks=app.callback_map)
+
+    # Compressed responses; the layout is cached and ETagged per data version
+    install_http_cache(server, lambda: data_manager.version, config['http_max_age'])
+
+    @server.route('/healthz')
+    def healthz():
+        if data_manager.ready:
+            return {'status': 'ready', 'version': data_manager.version}, 200
+        return {'status': 'loading', 'error': data_manager.error}, 503
+
+    # Bulk conversion at historical dates for other services
+    install_conversion(server, config, data_manager)
+
+    def table_columns(view):
+        rate = {'name': 'Rate vs USD', 'id': 'Rate', 'type': 'numeric',
+                'format': Format(precision=4, scheme=Scheme.fixed, group=Group.yes)}
+        if view == 'symbol':
+            return [{'name': 'Date', 'id': 'Date', 'type': 'datetime'}, rate,
+                    {'name': 'Change (%)', 'id': 'Change', 'type': 'numeric',
+                     'format': Format(precision=2, scheme=Scheme.fixed)}]
+        return [{'name': 'Code', 'id': 'Code'}, {'name': 'Currency', 'id': 'Currency'}, rate]
+
+    # Placeholder page shown while the first load is still running; reloads itself when ready
+    def loading_layout():
+        message = data_manager.error or "Loading exchange rates..."
+        return html.Div([
+            html.H3(message, style={'textAlign': 'center', 'fontFamily': 'Arial'}),
+            dcc.Interval(id='loading-poll', interval=1000),
+            dcc.Location(id='loading-reload', refresh=True)
+        ], style={
+            'backgroundColor': '#f5f7fa',
+            'minHeight': '100vh',
+            'padding': '30px'
+        })
+
+    # App layout, rebuilt from the current dataset on every page load
+    def serve_layout():
+        if not data_manager.ready:
+            data_manager.warm_up()
+            return loading_layout()
+        data = data_manager.get()
+        # Pick default dropdown currency dynamically
+        default_currency = data.rates.symbols[0] if data.rates.symbols else None
+
+        return html.Div([
+
+            # Section 1: Title + Dropdown + Input + Line Chart
+            html.Div([
+                html.H2("Currency Exchange Rates vs USD", style={
+                    'textAlign': 'center',
+                    'color': 'Black',
+                    'fontSize': '32px',
+                    'fontWeight': 'bold',
+                    'fontFamily': 'Arial Black',
+                    'marginTop': '20px'
+                }),
+                html.H4(f"Current Date: {data.latest_date}", style={'textAlign': 'center'}),
+                html.Div([
+                    dcc.Dropdown(
+                        options=[{'label': currency_names.get(cur, cur), 'value': cur} for cur in data.cross.currencies],
+                        value=config['base'],
+                        id='base-dropdown',
+                        clearable=False,
+                        style={
+                            'borderRadius': '8px',
+                            'padding': '8px',
+                            'boxShadow': '0px 2px 6px rgba(0,0,0,0.1)',
+                            'backgroundColor': 'white',
+                            'flex': '1',
+                            'marginRight': '15px'
+                        }
+                    ),
+                    dcc.Dropdown(
+                        options=[{'label': currency_names.get(col, col), 'value': col} for col in data.rates.symbols],
+                        value=default_currency,
+                        id='currency-dropdown',
+                        style={   #Cute Dropdown Styling
+                            'borderRadius': '8px',
+                            'padding': '8px',
+                            'boxShadow': '0px 2px 6px rgba(0,0,0,0.1)',
+                            'backgroundColor': 'white',
+                            'flex': '1'
+                        }
+                    )
+                ], style={'display': 'flex', 'marginBottom': '20px'}),
+                html.Label("Amount (in base currency):", style={'fontWeight': 'bold'}),
+                dcc.Input(
+                    id='usd-input',
+                    type='number',
+                    value=1,
+                    style={   # Optional: make input also a little cuter
+                        'width': '150px',
+                        'padding': '10px',
+                        'borderRadius': '8px',
+                        'border': '1px solid lightgray',
+                        'marginBottom': '20px'
+                    }
+                ),
+                html.Div(id='converted-value'),
+                # Time range shared by the line and volatility charts
+                html.Div([
+                    dcc.RadioItems(
+                        id='range-selector',
+                        options=[{'label': label, 'value': label} for label in RANGES]
+                        + [{'label': 'Custom', 'value': 'CUSTOM'}],
+                        value=config['default_range'],
+                        inline=True,
+                        inputStyle={'marginRight': '4px', 'marginLeft': '12px'}
+                    ),
+                    dcc.DatePickerRange(
+                        id='custom-range',
+                        min_date_allowed=data.rates.first_date,
+                        max_date_allowed=data.rates.last_date,
+                        start_date=data.rates.preset_window(config['default_range'])[0].date(),
+                        end_date=data.rates.last_date,
+                        display_format='YYYY-MM-DD',
+                        style={'marginLeft': '15px'}
+                    )
+                ], style={'display': 'flex', 'alignItems': 'center', 'marginTop': '20px'}),
+                # Latest USD rates shipped once per page load; the conversion runs in the browser
+                dcc.Store(id='latest-rates-store',
+                          data={config['base']: 1.0, **data.latest_rates.astype(float).to_dict()}),
+                dcc.Graph(id='line-chart', style={'width': '80%', 'margin': 'auto'})
+            ], style={
+                'width': '80%',
+                'margin': 'auto',
+                'backgroundColor': 'white',
+                'padding': '20px',
+                'borderRadius': '10px',
+                'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
+                'marginBottom': '30px'
+            }),
+
+            # Section 2: Table + Bar Chart Side by Side
+            html.Div([
+                html.Div([
+                    html.H3("Exchange Rates (vs USD)", style={
+                        'textAlign': 'center',
+                        'color': 'black',
+                        'fontSize': '20px',
+                        'fontWeight': 'bold',
+                        'fontFamily': 'Arial Black',
+                        'marginBottom': '10px'
+                    }),
+                    # Every symbol on one day, or the whole history of one symbol
+                    html.Div([
+                        dcc.RadioItems(
+                            id='table-view',
+                            options=[{'label': 'By date', 'value': 'date'},
+                                     {'label': 'Symbol history', 'value': 'symbol'}],
+                            value='date',
+                            inline=True,
+                            inputStyle={'marginRight': '4px', 'marginLeft': '12px'}
+                        ),
+                        dcc.DatePickerSingle(
+                            id='table-date',
+                            min_date_allowed=data.rates.first_date,
+                            max_date_allowed=data.rates.last_date,
+                            date=data.rates.last_date,
+                            display_format='YYYY-MM-DD',
+                            style={'marginLeft': '10px'}
+                        ),
+                        dcc.Dropdown(
+                            id='table-symbol',
+                            options=[{'label': currency_names.get(col, col), 'value': col}
+                                     for col in data.rates.symbols],
+                            value=default_currency,
+                            clearable=False,
+                            style={'flex': '1', 'marginLeft': '10px'}
+                        )
+                    ], style={'display': 'flex', 'alignItems': 'center', 'marginBottom': '10px'}),
+                    # Paged, filtered and sorted on the server: only the visible page is sent
+                    dash_table.DataTable(
+                        id='latest-rates-table',
+                        columns=table_columns('date'),
+                        page_action='custom',
+                        page_current=0,
+                        page_size=config['table_page_size'],
+                        filter_action='custom',
+                        filter_query='',
+                        sort_action='custom',
+                        sort_mode='multi',
+                        sort_by=[],
+                        style_table={
+                            'width': '100%',
+                            'height': '500px',
+                            'overflowY': 'auto',
+                            'overflowX': 'auto'
+                        },
+                        style_cell={
+                            'textAlign': 'center',
+                            'fontSize': 16,
+                            'fontFamily': 'Arial',
+                            'padding': '10px',
+                            'transition': 'background-color 0.3s ease'  # Smooth transition
+                        },
+                        style_header={
+                            'backgroundColor': 'lightgrey',
+                            'fontWeight': 'bold',
+                            'fontFamily': 'Arial Black',
+                            'textAlign': 'center'
+                        },
+                        style_data_conditional=[    # Cute Pastel Hover
+                            {
+                                'if': {'state': 'active'},
+                                'backgroundColor': '#e6e6ff',  # light pastel purple
+                                'border': '1px solid #d3d3d3'
+                            },
+                            {'if': {'column_id': 'Code'}, 'width': '15%'},
+                            {'if': {'column_id': 'Currency'}, 'width': '55%', 'textAlign': 'left'},
+                            {'if': {'column_id': 'Rate'}, 'width': '30%', 'textAlign': 'center'}
+                        ]
+                    )
+                ], style={
+                    'flex': '1',
+                    'backgroundColor': 'white',
+                    'padding': '20px',
+                    'borderRadius': '10px',
+                    'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
+                    'marginRight': '15px',
+                    'marginBottom': '30px'
+                }),
+
+                html.Div([
+                    html.H3("1-Year % Change vs USD", style={
+                        'textAlign': 'center',
+                        'color': 'black',
+                        'fontSize': '20px',
+                        'fontWeight': 'bold',
+                        'fontFamily': 'Arial Black',
+                        'marginBottom': '10px'
+                    }),
+                    dcc.Graph(
+                        id='bar-change',
+                        figure=figure_cache.get(
+                            bar_change_key(data.version),
+                            lambda: bar_change_figure(data.percentage_change)
+                        )
+                    )
+                ], style={
+                    'flex': '1',
+                    'backgroundColor': 'white',
+                    'padding': '20px',
+                    'borderRadius': '10px',
+                    'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
+                    'marginBottom': '30px'
+                })
+            ], style={
+                'width': '80%',
+                'margin': 'auto',
+                'paddingTop': '50px',
+                'display': 'flex',
+                'justifyContent': 'space-between',
+                'flexWrap': 'wrap'
+            }),
+
+            # Section 3: Volatility Line Chart
+            html.Div([
+                html.H3(f"Currency Volatility ({config['volatility_windows'][0]}-Day Rolling, Annualized)", style={
+                    'textAlign': 'center',
+                    'color': 'black',
+                    'fontSize': '20px',
+                    'fontWeight': 'bold',
+                    'fontFamily': 'Arial Black',
+                    'marginBottom': '20px'
+                }),
+                dcc.Graph(id='volatility-line')
+            ], style={
+                'width': '80%',
+                'margin': 'auto',
+                'backgroundColor': 'white',
+                'padding': '20px',
+                'borderRadius': '10px',
+                'boxShadow': '0px 2px 8px rgba(0,0,0,0.1)',
+                'marginBottom': '30px'
+            })
+
+        ], style={
+            'backgroundColor': '#f5f7fa',
+            'minHeight': '100vh',
+            'padding': '30px'
+        })
+
+    app.layout = serve_layout
+
+    @app.callback(
+        Output('loading-reload', 'href'),
+        Input('loading-poll', 'n_intervals')
+    )
+    def reload_when_ready(_):
+        return '/' if data_manager.ready else no_update
+
+    def range_window(data, range_value, custom_start, custom_end):
+        """``(start, end)`` Timestamps of the selected time range."""
+        if range_value == 'CUSTOM':
+            start = pd.Timestamp(custom_start or data.rates.first_date)
+            end = pd.Timestamp(custom_end or data.rates.last_date)
+            return (start, end) if start <= end else (end, start)
+        return data.rates.preset_window(range_value if range_value in RANGES else config['default_range'])
+
+    def chart_window(graph_id, selected, relayout_data):
+        # A zoom only counts when it is what triggered the update; any other change resets it
+        zoom = visible_range(relayout_data) if ctx.triggered_id == graph_id else None
+        return narrow_window(selected, zoom)
+
+    # Callbacks: the chart only depends on the currency; the amount conversion never reaches the server
+    # Charts are cut to the selected time range (narrowed by a zoom from relayoutData) with the
+    # precomputed day index, then downsampled, so the work per request follows the visible window
+    # rather than the length of the history; zooming in re-fetches full resolution
+    @app.callback(
+        Output('line-chart', 'figure'),
+        Input('currency-dropdown', 'value'),
+        Input('base-dropdown', 'value'),
+        Input('range-selector', 'value'),
+        Input('custom-range', 'start_date'),
+        Input('custom-range', 'end_date'),
+        Input('line-chart', 'relayoutData')
+    )
+    def update_chart(currency, base, range_value, custom_start, custom_end, relayout_data):
+        data = data_manager.get()
+        selected = range_window(data, range_value, custom_start, custom_end)
+        window = chart_window('line-chart', selected, relayout_data)
+
+        return figure_cache.get(
+            line_chart_key(base, currency, window, selected, data.version),
+            lambda: line_chart(data.cross, base, currency, window, selected, config['max_points_per_trace'])
+        )
+
+    @app.callback(
+        Output('volatility-line', 'figure'),
+        Input('range-selector', 'value'),
+        Input('custom-range', 'start_date'),
+        Input('custom-range', 'end_date'),
+        Input('volatility-line', 'relayoutData')
+    )
+    def update_volatility(range_value, custom_start, custom_end, relayout_data):
+        data = data_manager.get()
+        selected = range_window(data, range_value, custom_start, custom_end)
+        window = chart_window('volatility-line', selected, relayout_data)
+
+        return figure_cache.get(
+            volatility_key(window, selected, data.version),
+            lambda: volatility_chart(data.volatility, window, selected, config['max_points_per_trace'])
+        )
+
+    @app.callback(
+        Output('latest-rates-table', 'columns'),
+        Output('latest-rates-table', 'data'),
+        Output('latest-rates-table', 'page_count'),
+        Output('latest-rates-table', 'page_current'),
+        Input('table-view', 'value'),
+        Input('table-date', 'date'),
+        Input('table-symbol', 'value'),
+        Input('latest-rates-table', 'page_current'),
+        Input('latest-rates-table', 'page_size'),
+        Input('latest-rates-table', 'sort_by'),
+        Input('latest-rates-table', 'filter_query')
+    )
+    def update_table(view, day, symbol, page_current, page_size, sort_by, filter_query):
+        data = data_manager.get()
+        # A different view, day or filter starts again from the first page
+        resets = {'table-view.value', 'table-date.date', 'table-symbol.value', 'latest-rates-table.filter_query'}
+        if resets & set(ctx.triggered_prop_ids):
+            page_current = 0
+        if view == 'symbol' and symbol in data.rates.columns:
+            table = history_table(data.rates, symbol)
+        else:
+            view = 'date'
+            table, _ = date_table(data.rates, day or data.rates.last_date)
+        records, page_current, page_count = table_page(table, filter_query, sort_by, page_current,
+                                                       page_size or config['table_page_size'])
+        return table_columns(view), records, page_count, page_current
+
+    app.clientside_callback(
+        """
+        function(currency, base, amount, rates) {
+            if (!rates || !(currency in rates) || !(base in rates) || amount === null || amount === undefined) {
+                return '';
+            }
+            var format = function(value) {
+                return value.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+            };
+            var converted = amount * rates[currency] / rates[base];
+            return format(amount) + ' ' + base + ' = ' + format(converted) + ' ' + currency + ' (latest)';
+        }
+        """,
+        Output('converted-value', 'children'),
+        Input('currency-dropdown', 'value'),
+        Input('base-dropdown', 'value'),
+        Input('usd-input', 'value'),
+        Input('latest-rates-store', 'data')
+    )
+
+    return app
+
+
+_app_lock = threading.Lock()
+
+
+def __getattr__(name):
+    # ``app`` and ``server`` are built on first access (e.g. gunicorn's
+    # ``currency_exchange_final_project:server``), so importing this module for
+    # create_app() or from batch tools does not pull in Dash and Plotly
+    if name not in ('app', 'server'):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    with _app_lock:
+        if 'app' not in globals():
+            dash_app = create_app()
+            globals().update(app=dash_app, server=dash_app.server)
+    return globals()[name]
+
+
+if __name__ == '__main__':
+    app = create_app()
+    if '--summary' in sys.argv:
+        summarize(app.data_manager.get().rates.frame())
+    app.run(debug=True, use_reloader=False)
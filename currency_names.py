@@ -0,0 +1,15 @@
+# Currency full names
+currency_names = {
+    'KRW': 'KRW - South Korean Won',
+    'AUD': 'AUD - Australian Dollar',
+    'CAD': 'CAD - Canadian Dollar',
+    'PLN': 'PLN - Polish Zloty',
+    'MXN': 'MXN - Mexican Peso',
+    'EUR': 'EUR - Euro',
+    'INR': 'INR - Indian Rupee',
+    'CNY': 'CNY - Chinese Yuan',
+    'HKD': 'HKD - Hong Kong Dollar',
+    'THB': 'THB - Thai Baht',
+    'SGD': 'SGD - Singapore Dollar',
+    'USD': 'USD - US Dollar'
+}
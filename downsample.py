@@ -0,0 +1,129 @@
+"""Server-side downsampling so chart payloads stay bounded as history grows.
+
+Two strategies, both returning row indices into the original series:
+
+* ``lttb`` (Largest-Triangle-Three-Buckets) keeps the visual shape of a single
+  line with a fixed number of points,
+* ``minmax_indices`` keeps each bucket's minimum and maximum, vectorized over
+  every column of a 2-D array at once, for charts with many traces.
+
+``visible_range`` turns a Graph's ``relayoutData`` into the zoomed x range and
+``narrow_window`` keeps it inside the selected time range, so callbacks can
+slice to the visible window first and downsample only that.
+"""
+import numpy as np
+import pandas as pd
+
+
+def lttb(x, y, n_out):
+    """Indices of ``n_out`` points of ``(x, y)`` chosen by Largest-Triangle-Three-Buckets."""
+    n = len(x)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        # No room for a bucket between the endpoints: keep them, or only the latest point
+        return np.array([0, n - 1] if n_out == 2 else [n - 1][:max(n_out, 0)], dtype=np.int64)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # First and last points are always kept; the rest is split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        # Twice the triangle area between the last kept point, each candidate and the next bucket's mean
+        area = np.abs((x[selected] - avg_x) * (y[start:end] - y[selected])
+                      - (x[selected] - x[start:end]) * (avg_y - y[selected]))
+        selected = start + int(np.argmax(area))
+        indices[i + 1] = selected
+    return indices
+
+
+def minmax_indices(values, n_buckets):
+    """Per-column sorted indices of each bucket's min and max (NaNs are skipped).
+
+    ``values`` is (rows x columns); returns one index array per column, each
+    at most ``2 * n_buckets + 2`` long: the first and last valid points are
+    kept too, so a trace still spans its whole range.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if values.ndim == 1:
+        values = values[:, np.newaxis]
+    if 2 * n_buckets >= n:
+        return [np.flatnonzero(~np.isnan(values[:, col])) for col in range(values.shape[1])]
+    size = -(-n // n_buckets)
+    padded = np.full((size * n_buckets, values.shape[1]), np.nan)
+    padded[:n] = values
+    buckets = padded.reshape(n_buckets, size, values.shape[1])
+    offsets = np.arange(n_buckets)[:, np.newaxis] * size
+    lows = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    highs = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+    valid = ~np.isnan(values)
+    first = np.argmax(valid, axis=0)
+    last = n - 1 - np.argmax(valid[::-1], axis=0)
+    result = []
+    for col in range(values.shape[1]):
+        picked = np.unique(np.concatenate([[first[col]], lows[:, col], highs[:, col], [last[col]]]))
+        picked = picked[picked < n]
+        result.append(picked[valid[picked, col]])
+    return result
+
+
+def visible_range(relayout_data):
+    """``(start, end)`` timestamps of a zoomed x axis, or None for the full range."""
+    if not relayout_data or relayout_data.get('xaxis.autorange'):
+        return None
+    if 'xaxis.range[0]' in relayout_data and 'xaxis.range[1]' in relayout_data:
+        bounds = relayout_data['xaxis.range[0]'], relayout_data['xaxis.range[1]']
+    elif 'xaxis.range' in relayout_data:
+        bounds = relayout_data['xaxis.range']
+    else:
+        return None
+    try:
+        return pd.Timestamp(bounds[0]), pd.Timestamp(bounds[1])
+    except (TypeError, ValueError):
+        return None
+
+
+def narrow_window(window, zoom):
+    """``zoom`` clipped to ``window``; ``window`` itself when there is no zoom or no overlap."""
+    if zoom is None:
+        return window
+    start, end = max(window[0], zoom[0]), min(window[1], zoom[1])
+    return (start, end) if start < end else window
+
+
+def slice_rows(matrix, window):
+    """Positional ``slice`` of ``matrix`` rows covering ``window`` (one row of margin each side)."""
+    if window is None:
+        return slice(0, len(matrix))
+    rows = matrix.row_range(*window)
+    return slice(max(rows.start - 1, 0), min(rows.stop + 1, len(matrix)))
+
+
+def downsample_line(matrix, column, max_points, window=None):
+    """``Week_start`` + ``column`` frame of the RateMatrix rows inside ``window``, reduced with LTTB."""
+    rows = slice_rows(matrix, window)
+    days, values = matrix.days[rows], matrix.column(column)[rows]
+    valid = ~np.isnan(values)
+    if not valid.all():
+        days, values = days[valid], values[valid]
+    picked = lttb(days.astype(np.float64), values, max_points)
+    return pd.DataFrame({'Week_start': days[picked].astype('datetime64[D]'), column: values[picked]})
+
+
+def downsample_wide(matrix, max_points, value_name, var_name='Currency', window=None):
+    """Long-form (``Week_start``, ``var_name``, ``value_name``) min/max-downsampled frame."""
+    view = matrix.take_rows(slice_rows(matrix, window))
+    dates = view.dates
+    picked = minmax_indices(view.values, max((max_points - 2) // 2, 1))
+    return pd.DataFrame({
+        'Week_start': np.concatenate([dates[rows] for rows in picked]),
+        var_name: np.repeat(np.asarray(view.symbols, dtype=object), [len(rows) for rows in picked]),
+        value_name: np.concatenate([view.values[rows, col] for col, rows in enumerate(picked)]),
+    })
@@ -0,0 +1,77 @@
+"""Bounded LRU cache of pre-serialized Plotly figures.
+
+Building a figure with ``plotly.express`` and serializing it dominates the cost
+of a chart callback, while the result only changes when the data does. Entries
+are keyed on the data version, so a refresh makes old entries unreachable and
+the LRU bound ages them out.
+
+With a ``shared`` cache (see shared_cache.py) a local miss is looked up in the
+cross-worker cache first, and only one worker builds a missing figure.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS, STAGE_SECONDS
+
+
+class FigureCache:
+    def __init__(self, maxsize=64, shared=None):
+        self.maxsize = maxsize
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_json(self, key, build):
+        """Return the serialized figure for ``key``, calling ``build()`` on a miss."""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                CACHE_REQUESTS.inc(cache=key[0], result='hit')
+                return payload
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache=key[0], result='miss')
+
+        # Build outside the lock so one slow figure does not block other currencies
+        if self.shared is not None:
+            payload = self.shared.get_or_compute(_shared_key(key), lambda: _serialize(build).encode()).decode()
+        else:
+            payload = _serialize(build)
+        self._store(key, payload)
+        return payload
+
+    def put(self, key, payload):
+        """Publish a figure serialized elsewhere (see prebuild.py) here and in the shared cache."""
+        if self.shared is not None:
+            self.shared.set(_shared_key(key), payload.encode())
+        self._store(key, payload)
+
+    def _store(self, key, payload):
+        with self._lock:
+            self._entries[key] = payload
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key, build):
+        """Return the cached figure for ``key`` as a plain dict ready for a Dash output."""
+        return json.loads(self.get_json(key, build))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _shared_key(key):
+    return 'figure:' + ':'.join('..'.join(map(str, part)) if isinstance(part, tuple) else str(part) for part in key)
+
+
+def _serialize(build):
+    with STAGE_SECONDS.time(stage='figure_build'):
+        figure = build()
+    with STAGE_SECONDS.time(stage='serialize'):
+        return figure.to_json()
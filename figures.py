@@ -0,0 +1,90 @@
+"""Plotly figure builders shared by the dashboard callbacks and layout.
+
+``line_chart``/``volatility_chart`` go from the dataset to a figure (slice,
+downsample, plot) and the ``*_key`` functions name the figure-cache entry for
+each, so the callbacks and the prebuild workers (see prebuild.py) build and
+look up exactly the same thing.
+"""
+import plotly.express as px
+
+from currency_names import currency_names
+from downsample import downsample_line, downsample_wide, slice_rows
+from metrics import STAGE_SECONDS
+
+
+def line_chart_key(base, currency, window, selected, version):
+    return ('line-chart', base, currency, window, selected, version)
+
+
+def volatility_key(window, selected, version):
+    return ('volatility-line', window, selected, version)
+
+
+def bar_change_key(version):
+    return ('bar-change', version)
+
+
+def line_chart(cross, base, currency, window, selected, max_points):
+    """Line chart of ``currency`` per 1 ``base`` over ``window``, part of the ``selected`` range."""
+    with STAGE_SECONDS.time(stage='downsample'):
+        rows = slice_rows(cross.rates, window)
+        points = downsample_line(cross.pair(base, currency, rows), currency, max_points)
+    # A new pair or time range resets the zoom; zooming within it keeps the revision
+    return line_chart_figure(points, currency, base, window,
+                             revision=f"{base}:{currency}:{selected[0].date()}..{selected[1].date()}")
+
+
+def volatility_chart(volatility, window, selected, max_points):
+    with STAGE_SECONDS.time(stage='downsample'):
+        view = volatility.take_rows(slice_rows(volatility, window))
+        points = downsample_wide(view, max_points, 'Volatility')
+    return volatility_figure(points, window, revision=f"volatility:{selected[0].date()}..{selected[1].date()}")
+
+
+def line_chart_figure(df, currency, base, x_range=None, revision=None):
+    full_currency_name = currency_names.get(currency, currency)
+    fig = px.line(
+        df,
+        x='Week_start',
+        y=currency,
+        title=f"{full_currency_name} per 1 {currency_names.get(base, base)}",
+        labels={'Week_start': 'Week Start (Monday)', currency: full_currency_name}
+    )
+    fig.update_layout(
+        xaxis_range=list(x_range) if x_range else [df['Week_start'].min(), df['Week_start'].max()],
+        title_font=dict(size=20, family='Arial Black', color='black'),
+        title_x=0.5,
+        uirevision=revision or currency  # keep the user's zoom while re-fetched points arrive
+    )
+    return fig
+
+
+def bar_change_figure(percentage_change):
+    return px.bar(
+        x=percentage_change.index,
+        y=percentage_change.values,
+        labels={'x': 'Currency', 'y': '% Change'},
+        title=''
+    ).update_layout(
+        title_font=dict(size=20, family='Arial Black', color='black'),
+        title_x=0.5
+    )
+
+
+def volatility_figure(volatility, x_range=None, revision='volatility'):
+    """Line per currency from a long-form ``Week_start``/``Currency``/``Volatility`` frame."""
+    fig = px.line(
+        volatility,
+        x='Week_start',
+        y='Volatility',
+        color='Currency',
+        labels={'Week_start': 'Date', 'Volatility': 'Annualized Volatility'},
+        title=''
+    ).update_layout(
+        title_font=dict(size=20, family='Arial Black', color='black'),
+        title_x=0.5,
+        uirevision=revision
+    )
+    if x_range:
+        fig.update_layout(xaxis_range=list(x_range))
+    return fig
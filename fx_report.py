@@ -0,0 +1,148 @@
+"""Batch reports from the local rate store, for nightly jobs.
+
+Reads the memory-mapped store directly: no Dash, no Plotly and no network.
+Analytics run over the whole stored history for the requested symbols (so
+rolling windows have their look-back), and the output is written in chunks
+of days, so memory stays flat however long the range is.
+
+Two reports:
+
+* ``history`` (default) -- one row per day and symbol: rate, daily log
+  return, rolling volatility for each window and drawdown,
+* ``latest`` -- one row per symbol: latest rate and 1W/1M/YTD/1Y returns.
+
+    python fx_report.py --symbols EUR,JPY --windows 21,63 -o history.csv
+    python fx_report.py --report latest --format jsonl -o -
+    python fx_report.py --start 2020-01-01 --format parquet -o history.parquet
+
+Parquet output needs pyarrow.
+"""
+import argparse
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from analytics import Analytics
+from config import load_config
+from rate_store import RateStore
+
+FORMATS = ('csv', 'jsonl', 'parquet')
+CHUNK_DAYS = 1000
+
+
+def report_analytics(rates, symbols, windows):
+    """Analytics over the full history of ``symbols`` (only those columns are copied)."""
+    unknown = [symbol for symbol in symbols if symbol not in rates.columns]
+    if unknown:
+        raise SystemExit(f"Not in the store: {', '.join(unknown)} (stored: {', '.join(rates.symbols)})")
+    values = rates.values[:, [rates.columns[symbol] for symbol in symbols]]
+    return Analytics(rates.dates, values, symbols, windows=windows)
+
+
+def history_chunks(analytics, rows, chunk_days=CHUNK_DAYS):
+    """Long-form frames (Date, Symbol, Rate, Return, Volatility_<w>..., Drawdown) per block of days."""
+    symbols = np.asarray(analytics.symbols, dtype=object)
+    for start in range(rows.start, rows.stop, chunk_days):
+        block = slice(start, min(start + chunk_days, rows.stop))
+        n_days = block.stop - block.start
+        columns = {
+            'Date': np.repeat(analytics.dates[block].strftime('%Y-%m-%d').to_numpy(), len(symbols)),
+            'Symbol': np.tile(symbols, n_days),
+            'Rate': analytics.values[block].ravel(),
+            'Return': analytics.returns[block].ravel(),
+        }
+        for window in analytics.windows:
+            columns[f'Volatility_{window}'] = analytics.volatility[window][block].ravel()
+        columns['Drawdown'] = analytics.drawdown[block].ravel()
+        yield pd.DataFrame(columns)
+
+
+def latest_chunks(analytics):
+    returns = analytics.period_returns().T
+    frame = pd.DataFrame({
+        'Symbol': analytics.symbols,
+        'Date': analytics.dates[-1].strftime('%Y-%m-%d'),
+        'Rate': analytics.values[-1],
+    })
+    for label in returns.columns:
+        frame[f'Return_{label}'] = returns[label].to_numpy()
+    yield frame
+
+
+def write_chunks(chunks, output, fmt):
+    """Write ``chunks`` to ``output`` ('-' for stdout) one frame at a time; returns rows written."""
+    written = 0
+    if fmt == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise SystemExit("Parquet output needs pyarrow (pip install pyarrow)")
+        if output == '-':
+            raise SystemExit("Parquet cannot be written to stdout")
+        writer = None
+        try:
+            for chunk in chunks:
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(output, table.schema)
+                writer.write_table(table)  # one row group per chunk
+                written += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+        return written
+
+    handle = sys.stdout if output == '-' else open(output, 'w', newline='')
+    try:
+        for i, chunk in enumerate(chunks):
+            if fmt == 'csv':
+                chunk.to_csv(handle, header=i == 0, index=False)
+            else:
+                lines = chunk.to_json(orient='records', lines=True, double_precision=15)
+                handle.write(lines if lines.endswith('\n') else lines + '\n')
+            written += len(chunk)
+    finally:
+        if handle is not sys.stdout:
+            handle.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write rate analytics from the local store.')
+    parser.add_argument('--report', choices=('history', 'latest'), default='history')
+    parser.add_argument('--symbols', help='comma-separated symbols (default: the dashboard symbols)')
+    parser.add_argument('--windows', help='comma-separated volatility windows in days (default from config)')
+    parser.add_argument('--start', type=date.fromisoformat, help='first day of a history report')
+    parser.add_argument('--end', type=date.fromisoformat, help='last day of a history report')
+    parser.add_argument('--format', choices=FORMATS, help='output format (default: from the file extension)')
+    parser.add_argument('-o', '--output', default='-', help="output file, or '-' for stdout (default)")
+    parser.add_argument('--store', help='rate store directory')
+    parser.add_argument('--chunk-days', type=int, default=CHUNK_DAYS, help=f'days per chunk (default {CHUNK_DAYS})')
+    args = parser.parse_args(argv)
+
+    config = load_config({'store_path': args.store} if args.store else None)
+    rates = RateStore(config['store_path'], base=config['base']).load_matrix()
+    if rates is None:
+        raise SystemExit(f"The rate store at {config['store_path']!r} is empty; "
+                         "run the dashboard or backfill.py first")
+
+    symbols = [s.strip().upper() for s in args.symbols.split(',') if s.strip()] if args.symbols else \
+        [symbol for symbol in config['symbols'] if symbol in rates.columns]
+    windows = [int(w) for w in args.windows.split(',')] if args.windows else config['volatility_windows']
+    fmt = args.format or next((f for f in FORMATS if args.output.endswith('.' + f)), 'csv')
+
+    analytics = report_analytics(rates, symbols, windows)
+    if args.report == 'latest':
+        chunks = latest_chunks(analytics)
+    else:
+        chunks = history_chunks(analytics, rates.row_range(args.start, args.end), args.chunk_days)
+    written = write_chunks(chunks, args.output, fmt)
+    if args.output != '-':
+        print(f"Wrote {written} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Compression and conditional-GET caching for the Dash server.
+
+``/_dash-layout`` embeds the latest-rates table and the bar chart, so it is
+large but identical for every visitor until the data version changes. Its
+compressed body is kept per (path, data version, encoding) and served with a
+strong ETag, so a repeat visit costs a 304 (or a cached byte string) instead
+of rebuilding and re-encoding the layout. Every other JSON/text response,
+callback responses included, is gzip- or brotli-compressed on the way out.
+"""
+import gzip
+import hashlib
+import threading
+
+from flask import Response, g, request
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+# GET endpoints whose body only depends on the data version (and the code)
+VERSIONED_PATHS = ('/_dash-layout', '/_dash-dependencies')
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript')
+MIN_COMPRESS_BYTES = 1024
+
+
+def _negotiate_encoding():
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return 'identity'
+
+
+def _encode(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+def install(server, get_version, max_age=0):
+    """Register the before/after request hooks on a Flask ``server``.
+
+    ``get_version()`` returns the live data version, or None while the data
+    is still loading. A body is only cached under the version that was live
+    when its request started, and only if that version is still live once it
+    is built: a loading page built just before the data went live, or a
+    layout built while a refresh landed, is served but never cached.
+    """
+    cache = {}
+    lock = threading.Lock()
+    cache_control = f'public, max-age={max_age}, must-revalidate'
+
+    def _headers(etag, encoding):
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return headers
+
+    @server.before_request
+    def serve_from_cache():
+        if request.method != 'GET' or request.path not in VERSIONED_PATHS:
+            return None
+        version = g.http_cache_version = get_version()
+        if version is None:
+            return None
+        encoding = _negotiate_encoding()
+        with lock:
+            entry = cache.get((request.path, version, encoding))
+        if entry is None:
+            return None
+        etag, body = entry
+        if etag in request.if_none_match:
+            return Response(status=304, headers=_headers(etag, encoding))
+        return Response(body, mimetype='application/json', headers=_headers(etag, encoding))
+
+    @server.after_request
+    def compress_and_tag(response):
+        if (response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers
+                or not response.content_type.startswith(COMPRESSIBLE_TYPES)):
+            return response
+
+        body = response.get_data()
+        encoding = _negotiate_encoding() if len(body) >= MIN_COMPRESS_BYTES else 'identity'
+        version = g.get('http_cache_version')
+        if version is not None and version == get_version():
+            digest = hashlib.sha1(body).hexdigest()[:16]
+            etag = f'{version}-{digest}-{encoding}'
+            encoded = _encode(body, encoding)
+            with lock:
+                # Only the live version is worth keeping
+                for key in [key for key in cache if key[1] != version]:
+                    del cache[key]
+                cache[(request.path, version, encoding)] = (etag, encoded)
+            if etag in request.if_none_match:
+                return Response(status=304, headers=_headers(etag, encoding))
+            response.set_data(encoded)
+            response.headers.update(_headers(etag, encoding))
+            return response
+
+        if encoding != 'identity':
+            response.set_data(_encode(body, encoding))
+            response.headers['Content-Encoding'] = encoding
+            response.headers.add('Vary', 'Accept-Encoding')
+        return response
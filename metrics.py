@@ -0,0 +1,207 @@
+"""Latency, payload and cache instrumentation exposed in Prometheus text format.
+
+Metrics are plain module-level objects so any layer can record into them
+without importing Flask::
+
+    from metrics import STAGE_SECONDS
+    with STAGE_SECONDS.time(stage='figure_build'):
+        ...
+
+``install(server, ...)`` adds the request hooks that time every Dash callback
+and record its response size, serves ``GET /metrics``, and optionally runs
+cProfile on requests: always when the request carries ``X-Profile: 1`` (if
+``profile_header`` is enabled), and on a sample of requests when
+``profile_slow_ms`` is set, keeping only the profiles of requests slower than
+that. Profiles are written to ``profile_dir`` as ``.prof`` files for
+``python -m pstats`` or snakeviz.
+
+Each gunicorn worker keeps its own counters; samples carry a ``pid`` label so
+series scraped from different workers never overwrite each other.
+"""
+import bisect
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self):
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self, extra):
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key, extra)} {value}' for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def collect(self, extra):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        lines = []
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip([*self.buckets, float('inf')], counts):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else repr(float(bound))
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, [*extra, ("le", le)])} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key, extra)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key, extra)} {cumulative}')
+        return lines
+
+
+class GaugeFunction(_Metric):
+    """Gauge whose value is read from ``fn()`` at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, fn):
+        super().__init__(name, documentation)
+        self.fn = fn
+
+    def collect(self, extra):
+        return [f'{self.name}{_format_labels((), (), extra)} {self.fn()}']
+
+
+REGISTRY = []
+
+CALLBACK_SECONDS = Histogram('fx_callback_seconds', 'Dash callback latency, end to end', ['callback'])
+CALLBACK_BYTES = Histogram('fx_callback_response_bytes', 'Dash callback response size as sent',
+                           ['callback'], buckets=BYTES_BUCKETS)
+STAGE_SECONDS = Histogram('fx_stage_seconds', 'Time per stage: downsample, figure_build (includes downsample), serialize',
+                          ['stage'])
+CACHE_REQUESTS = Counter('fx_cache_requests_total', 'Figure cache lookups', ['cache', 'result'])
+UPSTREAM_SECONDS = Histogram('fx_upstream_seconds', 'Rate provider fetch latency', ['provider', 'outcome'])
+DATA_LOAD_SECONDS = Histogram('fx_data_load_seconds', 'Dataset load and refresh duration', ['kind'])
+DATA_READY = GaugeFunction('fx_data_ready', 'Whether the dataset has loaded', lambda: 0)
+
+
+def render():
+    """All registered metrics in Prometheus text exposition format."""
+    extra = [('pid', os.getpid())]
+    lines = []
+    for metric in REGISTRY:
+        samples = metric.collect(extra)
+        if samples:
+            lines.extend(metric.header())
+            lines.extend(samples)
+    return '\n'.join(lines) + '\n'
+
+
+def install(server, config, data_manager=None, callbacks=None):
+    """Register ``/metrics``, per-callback timing and optional profiling on a Flask ``server``.
+
+    ``callbacks`` is the Dash ``callback_map``: a request naming an output that is
+    not in it is counted as ``unknown``, so clients cannot mint new series.
+    """
+    import cProfile
+    from flask import Response, g, request
+
+    if data_manager is not None:
+        DATA_READY.fn = lambda: int(data_manager.ready)
+
+    profile_dir = config['profile_dir']
+    slow_seconds = config['profile_slow_ms'] / 1000
+
+    @server.route('/metrics')
+    def metrics():
+        return Response(render(), mimetype='text/plain; version=0.0.4')
+
+    @server.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_callback = None
+        if request.path.endswith('/_dash-update-component'):
+            body = request.get_json(silent=True)
+            output = body.get('output') if isinstance(body, dict) else None
+            known = isinstance(output, str) and (callbacks is None or output in callbacks)
+            g.metrics_callback = output if known else 'unknown'
+        wants_profile = config['profile_header'] and request.headers.get('X-Profile') == '1'
+        sampled = slow_seconds > 0 and random.random() < config['profile_sample_rate']
+        g.metrics_profiler = None
+        if wants_profile or sampled:
+            g.metrics_profile_forced = wants_profile
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+            except ValueError:
+                return  # another request on this process is already being profiled
+            g.metrics_profiler = profiler
+
+    @server.after_request
+    def record(response):
+        elapsed = time.perf_counter() - g.get('metrics_start', time.perf_counter())
+        callback = g.get('metrics_callback')
+        if callback is not None:
+            CALLBACK_SECONDS.observe(elapsed, callback=callback)
+            if not response.direct_passthrough:
+                CALLBACK_BYTES.observe(len(response.get_data()), callback=callback)
+
+        profiler = g.get('metrics_profiler')
+        if profiler is not None:
+            profiler.disable()
+            if g.metrics_profile_forced or elapsed >= slow_seconds:
+                os.makedirs(profile_dir, exist_ok=True)
+                name = (callback or request.path).strip('/').replace('/', '_').replace('.', '_') or 'root'
+                path = os.path.join(profile_dir, f'{int(time.time() * 1000)}-{os.getpid()}-{name[:60]}.prof')
+                profiler.dump_stats(path)
+                response.headers['X-Profile-File'] = path
+        return response
@@ -0,0 +1,170 @@
+"""Rebuild the charts of a new data version before it goes live.
+
+Every figure is keyed on the data version, so a refresh makes all of them
+stale at once: the line chart of each symbol, the change bars and the
+volatility chart. ``prebuild`` builds and serializes them, for the base and
+time range the dashboard opens on, and publishes the JSON to the figure cache
+(and through it the shared cache), so the first request after a refresh is a
+cache hit.
+
+A figure takes milliseconds, so a handful of them are built in process: a pool
+only pays off from ``prebuild_pool_min_tasks`` line charts up, and with more
+than one CPU to run on. The pool is
+started once per process and kept warm across versions. Its workers come from
+a fork server (spawned where there is none) rather than a fork of the app,
+which has request and refresher threads running, and each maps the store
+snapshot of a version itself instead of receiving the rates pickled. With a
+shared cache, one process prebuilds a version and the others wait for it.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from figures import bar_change_key, line_chart_key, volatility_key
+from metrics import DATA_LOAD_SECONDS
+
+# What a worker builds from: set by _init_worker, the engine replaced once per version
+_worker = {}
+
+# The process's pool and the settings it was started with
+_pool = None
+_pool_key = None
+_pool_lock = threading.Lock()
+
+
+def chart_tasks(dataset, config):
+    """``[(cache key, kind, args)]`` of every figure the dashboard opens on for ``dataset``."""
+    base = config['base']
+    selected = dataset.rates.preset_window(config['default_range'])
+    tasks = [(bar_change_key(dataset.version), 'bar-change', (dataset.percentage_change,)),
+             (volatility_key(selected, selected, dataset.version), 'volatility-line', (selected, selected))]
+    tasks += [(line_chart_key(base, symbol, selected, selected, dataset.version), 'line-chart',
+               (base, symbol, selected, selected)) for symbol in dataset.rates.symbols]
+    return tasks
+
+
+def _figure(kind, args, cross, volatility, max_points):
+    from figures import bar_change_figure, line_chart, volatility_chart
+
+    if kind == 'line-chart':
+        return line_chart(cross, *args, max_points)
+    if kind == 'volatility-line':
+        return volatility_chart(volatility, *args, max_points)
+    return bar_change_figure(*args)
+
+
+def _init_worker(store_path, base, max_points):
+    _worker.update(store_path=store_path, base=base, max_points=max_points, version=None)
+
+
+def _engine(version):
+    if _worker['version'] != version:
+        from cross_rates import CrossRateEngine
+        from rate_store import RateStore
+
+        rates = RateStore(_worker['store_path'], base=_worker['base']).load_matrix(version)
+        _worker.update(cross=CrossRateEngine(rates, usd_base=_worker['base'], version=version),
+                       version=version)
+    return _worker['cross']
+
+
+def _build(task):
+    version, key, args = task
+    return key, _figure('line-chart', args, _engine(version), None, _worker['max_points']).to_json()
+
+
+def _context():
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    # The fork server is started once, single-threaded, with Pandas and Plotly already
+    # imported, so workers are forked ready instead of importing them again
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['figures', 'cross_rates', 'rate_store'])
+    return context
+
+
+def _cpus():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not on macOS or Windows
+        return os.cpu_count() or 1
+
+
+def _executor(config):
+    """This process's pool, started on first use and again after a fork or a crash."""
+    global _pool, _pool_key
+    key = (os.getpid(), config['prebuild_workers'], config['store_path'], config['base'],
+           config['max_points_per_trace'])
+    with _pool_lock:
+        if _pool is not None and _pool_key != key:
+            if _pool_key[0] == key[0]:  # a pool inherited through fork is not ours to stop
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=config['prebuild_workers'],
+                mp_context=_context(),
+                initializer=_init_worker,
+                initargs=(config['store_path'], config['base'], config['max_points_per_trace'])
+            )
+            _pool_key = key
+        return _pool
+
+
+def _discard(executor):
+    global _pool
+    with _pool_lock:
+        if _pool is executor:
+            _pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_figures(dataset, config, tasks):
+    """Yield ``(key, figure JSON)`` for ``tasks``, the line charts on the pool when there are enough."""
+    max_points = config['max_points_per_trace']
+    remote = [(dataset.version, key, args) for key, kind, args in tasks if kind == 'line-chart']
+    if len(remote) < config['prebuild_pool_min_tasks'] or _cpus() < 2:
+        remote = []
+    local = [task for task in tasks if task[1] != 'line-chart'] if remote else tasks
+    for key, kind, args in local:
+        yield key, _figure(kind, args, dataset.cross, dataset.volatility, max_points).to_json()
+    if not remote:
+        return
+
+    executor = _executor(config)
+    workers = config['prebuild_workers']
+    try:
+        # A few tasks per message: a figure takes milliseconds, a round trip is not free
+        yield from executor.map(_build, remote, timeout=config['prebuild_timeout'],
+                                chunksize=max(len(remote) // (workers * 4), 1))
+    except (BrokenProcessPool, TimeoutError):
+        # A worker died or hangs: start a fresh pool next time
+        _discard(executor)
+        raise
+
+
+def prebuild(dataset, config, figure_cache, shared_cache=None):
+    """Build every chart of ``dataset`` and publish it to ``figure_cache``."""
+    def run():
+        started = time.perf_counter()
+        tasks = chart_tasks(dataset, config)
+        for key, payload in build_figures(dataset, config, tasks):
+            figure_cache.put(key, payload)
+        print(f"Prebuilt {len(tasks)} figures for {dataset.version} "
+              f"in {time.perf_counter() - started:.1f}s")
+        return b'1'
+
+    with DATA_LOAD_SECONDS.time(kind='prebuild'):
+        try:
+            if shared_cache is None:
+                run()
+            else:
+                key = f"prebuilt:{dataset.version}:{config['base']}:{config['default_range']}"
+                shared_cache.get_or_compute(key, run, lock_ttl=config['prebuild_timeout'])
+        except TimeoutError:
+            print(f"Prebuild of {dataset.version} timed out; the rest is built on demand")
+        except BrokenProcessPool as e:
+            print(f"Prebuild of {dataset.version} lost its workers ({e}); the rest is built on demand")
@@ -0,0 +1,238 @@
+"""Exchange-rate providers and the failover chain the data layer fetches through.
+
+Every provider returns the same shape: a frame with a ``Date`` column and one
+float column per requested symbol, quoted against ``base``. ``ProviderChain``
+queries its providers concurrently over one pooled ``requests.Session`` and
+returns the first usable answer in priority order, so one slow or failing
+upstream costs at most the chain's timeout instead of the whole dashboard.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import UPSTREAM_SECONDS
+from rate_parser import CHUNK_SIZE, stream_rates, stream_rates_file
+from replay import install as install_replay
+from synthetic import synthetic_rates
+
+
+class ProviderError(RuntimeError):
+    """Raised when no provider could supply the requested rates."""
+
+
+def make_session(pool_size=10, retries=3, backoff=0.5):
+    """Pooled session that retries idempotent requests with exponential backoff."""
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',)
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class RateProvider:
+    name = 'provider'
+    # Rates from a different source than the primary; stored, but replaced once it has the days
+    provisional = False
+
+    def __init__(self, session=None, timeout=10):
+        self.session = session or make_session()
+        self.timeout = timeout
+
+    def fetch_range(self, start, end, base, symbols):
+        raise NotImplementedError
+
+
+def _frame_from_rates(rates_by_day, symbols):
+    """Turn ``{'YYYY-MM-DD': {symbol: rate}}`` into the common Date + symbols frame."""
+    rates = pd.DataFrame(rates_by_day).T
+    rates.index.name = 'Date'
+    rates.reset_index(inplace=True)
+    rates['Date'] = pd.to_datetime(rates['Date'])
+    return rates.reindex(columns=['Date', *symbols]).sort_values('Date').reset_index(drop=True)
+
+
+class FrankfurterProvider(RateProvider):
+    """ECB reference rates from api.frankfurter.app, with full history."""
+    name = 'frankfurter'
+
+    def __init__(self, url='https://api.frankfurter.app', **kwargs):
+        super().__init__(**kwargs)
+        self.url = url.rstrip('/')
+
+    def fetch_range(self, start, end, base, symbols):
+        # Streamed: long ranges are parsed day by day instead of decoded in one go
+        with self.session.get(
+            f"{self.url}/{start}..{end}",
+            params={'from': base, 'to': ','.join(symbols)},
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            rates, _ = stream_rates(response.iter_content(CHUNK_SIZE), symbols, start, end)
+        return rates
+
+
+class OpenErApiProvider(RateProvider):
+    """Daily rates from open.er-api.com; the free endpoint only has the latest day.
+
+    It therefore only answers short, incremental ranges, so a failover during a
+    full history load can never leave the store with a single day in it.
+    """
+    name = 'open_er_api'
+    max_range_days = 7
+    # Not ECB reference rates, and dated in UTC including weekends
+    provisional = True
+
+    def __init__(self, url='https://open.er-api.com/v6/latest', **kwargs):
+        super().__init__(**kwargs)
+        self.url = url.rstrip('/')
+
+    def fetch_range(self, start, end, base, symbols):
+        if (end - start).days > self.max_range_days:
+            raise ProviderError(f"open.er-api has no history for {start}..{end}")
+        response = self.session.get(f"{self.url}/{base}", timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        if data.get('result') != 'success':
+            raise ProviderError(f"open.er-api returned {data.get('error-type', data.get('result'))}")
+        day = datetime.fromtimestamp(data['time_last_update_unix'], tz=timezone.utc).date()
+        if not start <= day <= end:
+            raise ProviderError(f"open.er-api only has {day}, not {start}..{end}")
+        return _frame_from_rates({day.isoformat(): data['rates']}, symbols)
+
+
+class FileProvider(RateProvider):
+    """Rates read from a local file: a ``Date,<symbols>`` CSV or a Frankfurter range JSON.
+
+    Used as an offline stand-in for the HTTP providers (fixtures, air-gapped
+    boxes) and as a last resort behind them.
+    """
+    name = 'file'
+
+    def __init__(self, path):
+        self.session = None
+        self.timeout = None
+        self.path = path
+
+    def fetch_range(self, start, end, base, symbols):
+        if not os.path.exists(self.path):
+            raise ProviderError(f"Fixture {self.path!r} does not exist")
+        if self.path.endswith('.json'):
+            rates, header = stream_rates_file(self.path, symbols, start, end)
+            if header.get('base', base) != base:
+                raise ProviderError(f"Fixture {self.path!r} is quoted in {header['base']}, not {base}")
+        else:
+            rates = pd.read_csv(self.path, parse_dates=['Date'])
+            rates = rates.reindex(columns=['Date', *symbols]).sort_values('Date')
+        in_range = (rates['Date'] >= pd.Timestamp(start)) & (rates['Date'] <= pd.Timestamp(end))
+        return rates[in_range].reset_index(drop=True)
+
+
+class SyntheticProvider(RateProvider):
+    """Seeded random-walk rates (see synthetic.py) for load tests; no network at all."""
+    name = 'synthetic'
+
+    def __init__(self, seed=0):
+        self.session = None
+        self.timeout = None
+        self.seed = seed
+
+    def fetch_range(self, start, end, base, symbols):
+        return synthetic_rates(start, end, symbols, seed=self.seed)
+
+
+class ProviderChain:
+    """Fetch from several providers at once and keep the best answer that arrives in time.
+
+    Providers are listed in priority order. All of them are started
+    concurrently; the chain then takes the first non-empty result in priority
+    order, waiting at most ``timeout`` seconds in total. If none has rows but
+    at least one answered, the range simply has no business days and an empty
+    frame is returned; ``ProviderError`` means every provider failed.
+
+    ``concurrency`` is how many ``fetch_range`` calls may run at once (the
+    backfill makes several); the timeout starts once a call's fetches do.
+    """
+
+    def __init__(self, providers, timeout=15, concurrency=1):
+        self.providers = providers
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max(len(providers), 1) * concurrency,
+                                            thread_name_prefix='rate-provider')
+
+    def fetch_range(self, start, end, base, symbols):
+        started = threading.Event()
+
+        def fetch(provider):
+            started.set()
+            return _timed_fetch(provider, start, end, base, symbols)
+
+        futures = [self._executor.submit(fetch, provider) for provider in self.providers]
+        # Time spent queued behind other calls does not count against the timeout
+        started.wait()
+        deadline = time.monotonic() + self.timeout
+        errors = []
+        empty = None
+        for provider, future in zip(self.providers, futures):
+            try:
+                rates = future.result(timeout=max(deadline - time.monotonic(), 0))
+            except Exception as e:
+                errors.append(f"{provider.name}: {str(e) or type(e).__name__}")
+                continue
+            if not rates.empty:
+                for other in futures:
+                    other.cancel()
+                rates.attrs['provisional'] = provider.provisional
+                return rates
+            empty = rates if empty is None else empty
+        # A range without business days (a weekend) is a valid, empty answer
+        if empty is not None:
+            return empty
+        raise ProviderError('All rate providers failed (' + '; '.join(errors) + ')')
+
+
+def _timed_fetch(provider, start, end, base, symbols):
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        rates = provider.fetch_range(start, end, base, symbols)
+        outcome = 'ok' if not rates.empty else 'empty'
+        return rates
+    finally:
+        UPSTREAM_SECONDS.observe(time.perf_counter() - started, provider=provider.name, outcome=outcome)
+
+
+def build_providers(config, concurrency=1):
+    """Build the ProviderChain described by ``config['providers']``.
+
+    ``concurrency`` is how many ranges are fetched at once (see ``ProviderChain``).
+    """
+    # Served from recorded fixtures instead of the network when replay_dir is set
+    session = install_replay(make_session(pool_size=max(10, concurrency), retries=config['fetch_retries']),
+                             config)
+    available = {
+        'frankfurter': lambda: FrankfurterProvider(config['frankfurter_url'], session=session,
+                                                   timeout=config['fetch_timeout']),
+        'open_er_api': lambda: OpenErApiProvider(config['open_er_api_url'], session=session,
+                                                 timeout=config['fetch_timeout']),
+        'file': lambda: FileProvider(config['fixture_path']),
+        'synthetic': lambda: SyntheticProvider(config['synthetic_seed']),
+    }
+    unknown = set(config['providers']) - set(available)
+    if unknown:
+        raise ValueError(f"Unknown rate providers: {', '.join(sorted(unknown))}")
+    return ProviderChain([available[name]() for name in config['providers']],
+                         timeout=config['fetch_timeout'] * 1.5, concurrency=concurrency)
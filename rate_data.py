@@ -0,0 +1,230 @@
+"""Data layer of the dashboard: fetching, storing and precomputing rates.
+
+Nothing here runs at import time. ``DataManager.get()`` loads the dataset on
+first use (or ``warm_up()`` does it on a background thread), so the web app can
+be imported and forked by gunicorn without touching the network.
+
+Once loaded, a refresher thread polls for new business days and rebuilds the
+dataset off the request path. Each ``RateDataset`` is immutable and is
+published by replacing a single reference, so a callback that called ``get()``
+keeps a consistent frame even if a refresh lands while it is running. A
+``prepare`` hook runs on each refreshed dataset before it is published, and on
+a background thread once the first one is; the app uses it to prebuild the
+charts of the new version (see prebuild.py).
+"""
+import pickle
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import pandas as pd
+
+from analytics import Analytics
+from cross_rates import CrossRateEngine
+from metrics import DATA_LOAD_SECONDS
+from providers import ProviderError, build_providers
+from rate_matrix import RateMatrix
+from rate_store import RateStore
+
+
+class DataUnavailable(RuntimeError):
+    """Raised when no rates could be fetched and the local store is empty."""
+
+
+@dataclass(frozen=True)
+class RateDataset:
+    rates: RateMatrix
+    latest_rates: pd.Series
+    percentage_change: pd.Series
+    volatility: RateMatrix
+    period_returns: pd.DataFrame
+    analytics: Analytics
+    cross: CrossRateEngine
+    latest_date: str
+    version: str
+
+
+def build_analytics(rates, windows, previous=None):
+    """Analytics for a RateMatrix, extending ``previous`` when the history only grew."""
+    if previous is not None and previous.can_extend(rates.dates, rates.symbols, rates.values):
+        known = len(previous.dates)
+        if len(rates) == known:
+            return previous
+        return previous.extend(rates.dates[known:], rates.values[known:])
+    return Analytics(rates.dates, rates.values, rates.symbols, windows=windows)
+
+
+def build_dataset(rates, version, analytics, base='USD'):
+    """Precompute everything the dashboard shows for the ``rates`` history.
+
+    ``analytics`` covers the whole stored history; ``rates`` may be its tail.
+    """
+    start_row = len(analytics.dates) - len(rates)
+    period_returns = analytics.period_returns()
+
+    return RateDataset(
+        rates=rates,
+        latest_rates=rates.row(-1),
+        percentage_change=period_returns.loc['1Y'],
+        volatility=analytics.volatility_matrix(analytics.windows[0], start_row),
+        period_returns=period_returns,
+        analytics=analytics,
+        cross=CrossRateEngine(rates, usd_base=base, version=version),
+        latest_date=rates.last_date,
+        version=version
+    )
+
+
+class DataManager:
+    def __init__(self, config, shared_cache=None, prepare=None):
+        self.config = config
+        self.shared_cache = shared_cache
+        self.prepare = prepare
+        self.store = RateStore(config['store_path'], base=config['base'])
+        self.providers = build_providers(config)
+        self._dataset = None
+        self._analytics = None
+        self._error = None
+        self._lock = threading.Lock()
+        self._warm_up_lock = threading.Lock()
+        self._warm_up_running = False
+        self._refresh_lock = threading.Lock()
+        self._refresher = None
+
+    @property
+    def ready(self):
+        return self._dataset is not None
+
+    @property
+    def error(self):
+        return self._error
+
+    @property
+    def version(self):
+        """Version of the dataset being served (the store snapshot name), or None."""
+        dataset = self._dataset
+        return dataset.version if dataset is not None else None
+
+    def fetch_rates(self, fetch_start, fetch_end):
+        return self.providers.fetch_range(fetch_start, fetch_end, self.config['base'],
+                                          self.config['symbols'])
+
+    def get(self):
+        """Return the current dataset, loading it first if necessary."""
+        dataset = self._dataset
+        if dataset is not None:
+            return dataset
+        with self._lock:
+            if self._dataset is None:
+                with DATA_LOAD_SECONDS.time(kind='load'):
+                    dataset = self._load()
+                self._dataset = dataset
+                # Nothing is cached yet either way, so the first load does not wait for it
+                if self.prepare is not None:
+                    threading.Thread(target=self._prepare, args=(dataset,),
+                                     name='rate-data-prepare', daemon=True).start()
+            return self._dataset
+
+    def warm_up(self):
+        """Load the dataset on a daemon thread unless it is loaded or already loading."""
+        with self._warm_up_lock:
+            if self._warm_up_running or self.ready:
+                return
+            self._warm_up_running = True
+        threading.Thread(target=self._warm_up, name='rate-data-warm-up', daemon=True).start()
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except DataUnavailable:
+            pass  # recorded in self._error; the next request retries
+        finally:
+            with self._warm_up_lock:
+                self._warm_up_running = False
+
+    def refresh(self):
+        """Pick up new business days and swap in the rebuilt dataset.
+
+        Returns True when a new version went live.
+        """
+        if not self.ready:
+            self.get()
+            return True
+        with self._refresh_lock:
+            current = self._dataset
+            with DATA_LOAD_SECONDS.time(kind='refresh'):
+                dataset = self._load(current)
+            if dataset is current:
+                return False
+            self._prepare(dataset)
+            self._dataset = dataset
+            return True
+
+    def _prepare(self, dataset):
+        if self.prepare is None:
+            return
+        try:
+            self.prepare(dataset)
+        except Exception as e:  # the data is still good; anything missing is built on demand
+            print(f"Preparing {dataset.version} failed: {e}")
+
+    def start_refresher(self):
+        """Poll for new data every ``refresh_interval`` seconds on a daemon thread."""
+        interval = self.config['refresh_interval']
+        with self._warm_up_lock:
+            if not interval or self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, args=(interval,),
+                                               name='rate-data-refresher', daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:  # keep polling; the current dataset stays live
+                print(f"Rate refresh failed: {e}")
+
+    def _load(self, current=None):
+        end_date = date.today()
+        start_date = end_date - timedelta(days=self.config['history_days'])
+        try:
+            self.store.update(self.fetch_rates, start_date, end_date)
+        except ProviderError as e:
+            # Serve the last stored snapshot rather than failing outright
+            if self.store.version() is None:
+                self._error = f"Failed to fetch data: {e}"
+                raise DataUnavailable(self._error) from e
+            print(f"Failed to fetch data, using stored rates: {e}")
+        self._error = None
+
+        version = self.store.version()
+        if version is None:
+            self._error = f"No rates published for {start_date}..{end_date}"
+            raise DataUnavailable(self._error)
+        if current is not None and current.version == version:
+            return current
+
+        # A view over the mapped snapshot; the charts pick their time range from it per request
+        rates = self.store.load_matrix(version)
+        self._analytics = self._build_analytics(rates, version)
+        return build_dataset(rates, version, self._analytics, base=self.config['base'])
+
+    def _build_analytics(self, rates, version):
+        windows = self.config['volatility_windows']
+        if self.shared_cache is None:
+            return build_analytics(rates, windows, self._analytics)
+        # One worker computes the analytics for a new version; the others load its result
+        key = f"analytics:{Analytics.FORMAT}:{version}:{','.join(map(str, windows))}"
+        payload = self.shared_cache.get_or_compute(
+            key, lambda: pickle.dumps(build_analytics(rates, windows, self._analytics), protocol=5))
+        return pickle.loads(payload)
+
+
+def summarize(df):
+    """Print the same quick data checks the original script printed at start-up."""
+    print(f'Display Data:\n{df.head()}')
+    print(f'Statistical Summary:\n{df.describe()}')
+    print(f'Checking Null Values:\n{df.isnull().sum()}')
@@ -0,0 +1,122 @@
+"""Compact days x symbols rate matrix.
+
+A ``RateMatrix`` is three things: an int32 array of day ordinals (days since
+1970-01-01, sorted), one contiguous 2-D float array of rates and a
+symbol -> column map. Loaded from the store it wraps the memory-mapped
+snapshot directly, so nothing is parsed or copied.
+
+Everything that slices it returns views: ``column(symbol)`` is a view of one
+column (contiguous, as the store writes Fortran order), and
+``between``/``since``/``take_rows`` narrow the days and share the same
+buffer. Dates are turned into row offsets through a day index built once
+per matrix (one int32 per calendar day, first to last), so a date range is
+two array lookups. Build a DataFrame with ``frame()`` only at the edges,
+where pandas or Plotly need one.
+"""
+import numpy as np
+import pandas as pd
+
+# Time ranges offered by the dashboard, counted back from the latest day; None is everything
+RANGES = {
+    '1M': pd.DateOffset(months=1),
+    '6M': pd.DateOffset(months=6),
+    '1Y': pd.DateOffset(years=1),
+    '5Y': pd.DateOffset(years=5),
+    'MAX': None,
+}
+
+
+def day_ordinals(dates):
+    """int32 days since the epoch for anything ``np.datetime64`` understands."""
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int32)
+
+
+def day_ordinal(value):
+    """Day ordinal of one date-like value (a string, date or Timestamp)."""
+    return int(np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64))
+
+
+class RateMatrix:
+    def __init__(self, days, values, symbols, day_index=None):
+        self.days = np.asarray(days, dtype=np.int32)
+        self._day_index = day_index
+        self.values = np.asarray(values)
+        self.symbols = list(symbols)
+        self.columns = {symbol: i for i, symbol in enumerate(self.symbols)}
+        if self.values.shape != (len(self.days), len(self.symbols)):
+            raise ValueError(f"{self.values.shape} values for {len(self.days)} days x {len(self.symbols)} symbols")
+
+    @classmethod
+    def from_frame(cls, df, date_column='Date', dtype=np.float64):
+        """Matrix of a ``date_column`` + symbols frame; a single float block is not copied."""
+        symbols = [column for column in df.columns if column != date_column]
+        return cls(day_ordinals(df[date_column].to_numpy()), df[symbols].to_numpy(dtype=dtype), symbols)
+
+    def __len__(self):
+        return len(self.days)
+
+    @property
+    def dates(self):
+        """Days as ``datetime64[D]`` (a small int64 copy of the ordinals)."""
+        return self.days.astype('datetime64[D]')
+
+    @property
+    def first_date(self):
+        return str(np.datetime64(int(self.days[0]), 'D'))
+
+    @property
+    def last_date(self):
+        return str(np.datetime64(int(self.days[-1]), 'D'))
+
+    def column(self, symbol):
+        """View of one symbol's rates."""
+        return self.values[:, self.columns[symbol]]
+
+    def row(self, i):
+        """``pd.Series`` of every symbol on row ``i`` (-1 for the latest day)."""
+        return pd.Series(self.values[i], index=self.symbols)
+
+    def with_values(self, values, symbols):
+        """Matrix over the same days (and day index) with other ``values``."""
+        return RateMatrix(self.days, values, symbols, day_index=self._day_index)
+
+    def take_rows(self, rows):
+        """Matrix of ``rows`` (a slice keeps it a view)."""
+        return RateMatrix(self.days[rows], self.values[rows], self.symbols)
+
+    @property
+    def day_index(self):
+        """``index[d]`` = number of rows dated before day ``first + d``, for every calendar day."""
+        if self._day_index is None:
+            if len(self.days):
+                calendar = np.arange(self.days[0], self.days[-1] + 2, dtype=np.int32)
+                self._day_index = np.searchsorted(self.days, calendar).astype(np.int32)
+            else:
+                self._day_index = np.zeros(1, dtype=np.int32)
+        return self._day_index
+
+    def _rows_before(self, ordinal):
+        index = self.day_index
+        if not len(self.days):
+            return 0
+        return int(index[min(max(ordinal - int(self.days[0]), 0), len(index) - 1)])
+
+    def row_range(self, start=None, end=None):
+        """``slice`` of the rows dated within ``[start, end]``, through the day index."""
+        first = 0 if start is None else self._rows_before(day_ordinal(start))
+        last = len(self.days) if end is None else self._rows_before(day_ordinal(end) + 1)
+        return slice(first, max(first, last))
+
+    def preset_window(self, label):
+        """``(start, end)`` Timestamps of a ``RANGES`` label ending on the latest day."""
+        end = pd.Timestamp(self.last_date)
+        offset = RANGES[label]
+        start = pd.Timestamp(self.first_date) if offset is None else end - offset
+        return start, end
+
+    def frame(self, date_column='Week_start', symbols=None):
+        """DataFrame with a date column first; the rates are not copied for a full selection."""
+        values = self.values if symbols is None else self.values[:, [self.columns[s] for s in symbols]]
+        frame = pd.DataFrame(values, columns=self.symbols if symbols is None else list(symbols), copy=False)
+        frame.insert(0, date_column, pd.to_datetime(self.dates))
+        return frame
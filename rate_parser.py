@@ -0,0 +1,128 @@
+"""Streaming parser for Frankfurter-style ``{"rates": {day: {symbol: rate}}}`` JSON.
+
+``response.json()`` followed by ``pd.DataFrame(rates).T`` holds the decoded
+dict-of-dicts, an object DataFrame and its transposed float copy at the same
+time, which is the memory peak of a long history load. ``stream_rates`` reads
+the document in chunks instead, decodes one day at a time and writes the
+rates straight into a preallocated float64 array, so peak memory stays close
+to the size of the final frame.
+
+Only the shape the providers return is supported: a top-level object whose
+``"rates"`` member maps ``"YYYY-MM-DD"`` keys to flat ``{symbol: number}``
+objects. Members other than ``"rates"`` are returned as a small header dict
+when they come before it and are skipped otherwise.
+"""
+import codecs
+import json
+import re
+
+import numpy as np
+import pandas as pd
+
+try:
+    from orjson import loads as _loads
+except ImportError:  # optional; the standard library parser is about 2x slower here
+    _loads = json.loads
+
+CHUNK_SIZE = 64 * 1024
+
+_RATES_KEY = re.compile(r'"rates"\s*:\s*\{')
+_DAY = re.compile(r'\s*,?\s*"(\d{4}-\d{2}-\d{2})"\s*:\s*(\{[^{}]*\})')
+_END = re.compile(r'\s*\}')
+
+
+class _Rows:
+    """Growable (days x symbols) float64 array filled one day at a time."""
+
+    def __init__(self, symbols, capacity):
+        self.columns = {symbol: i for i, symbol in enumerate(symbols)}
+        self.dates = np.empty(max(capacity, 1), dtype='datetime64[D]')
+        self.values = np.full((max(capacity, 1), len(symbols)), np.nan, order='F')
+        self.size = 0
+        self._layouts = {}
+
+    def append(self, day, rates):
+        if self.size == len(self.dates):
+            # More days than business days in the range (weekend fixes); grow by half
+            capacity = len(self.dates) + len(self.dates) // 2 + 1
+            self.dates = np.resize(self.dates, capacity)
+            values = np.full((capacity, self.values.shape[1]), np.nan, order='F')
+            values[:self.size] = self.values[:self.size]
+            self.values = values
+        self.dates[self.size] = day
+        # Days almost always list the same symbols in the same order: map that layout once
+        keys = tuple(rates)
+        layout = self._layouts.get(keys)
+        if layout is None:
+            known = [i for i, symbol in enumerate(keys) if symbol in self.columns]
+            layout = (known, [self.columns[keys[i]] for i in known])
+            self._layouts[keys] = layout
+        values = np.array(list(rates.values()), dtype=np.float64)  # None -> NaN
+        self.values[self.size, layout[1]] = values[layout[0]]
+        self.size += 1
+
+    def frame(self):
+        dates, values = self.dates[:self.size], self.values[:self.size]
+        if self.size > 1 and (np.diff(dates) <= np.timedelta64(0, 'D')).any():
+            order = np.argsort(dates, kind='stable')
+            dates, values = dates[order], np.asfortranarray(values[order])
+        frame = pd.DataFrame(values, columns=list(self.columns), copy=False)
+        frame.insert(0, 'Date', pd.to_datetime(dates.astype('datetime64[us]')))
+        return frame
+
+
+def _text_chunks(chunks):
+    """Decode an iterable of bytes or str chunks to str without splitting characters."""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for chunk in chunks:
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    yield decoder.decode(b'', final=True)
+
+
+def stream_rates(chunks, symbols, start=None, end=None):
+    """Parse rates JSON from ``chunks`` into a ``Date`` + ``symbols`` frame.
+
+    ``start``/``end`` only size the initial allocation (one row per business
+    day); days outside them are kept. Returns ``(frame, header)`` where
+    ``header`` holds the top-level members that precede ``"rates"``, such as
+    ``base``.
+    """
+    capacity = int(np.busday_count(start, np.datetime64(end) + 1)) if start and end else 256
+    rows = _Rows(symbols, capacity)
+    chunks = _text_chunks(chunks)
+    buffer, pos, header = '', 0, None
+    exhausted = False
+
+    while True:
+        if header is None:
+            match = _RATES_KEY.search(buffer)
+            if match:
+                prefix = buffer[:match.start()].rstrip().rstrip(',')
+                header = json.loads(prefix + '}') if prefix.strip() != '{' else {}
+                pos = match.end()
+                continue
+        else:
+            match = _DAY.match(buffer, pos)
+            if match:
+                rows.append(np.datetime64(match.group(1), 'D'), _loads(match.group(2)))
+                pos = match.end()
+                continue
+            if _END.match(buffer, pos):
+                return rows.frame(), header
+
+        if exhausted:
+            raise ValueError(f"Malformed or truncated rates JSON near: {buffer[pos:pos + 80]!r}")
+        # Need more input; drop what has been consumed so the buffer stays one chunk or so
+        buffer = buffer[pos:]
+        pos = 0
+        chunk = next(chunks, None)
+        if chunk is None:
+            exhausted = True
+        else:
+            buffer += chunk
+
+
+def stream_rates_file(path, symbols, start=None, end=None, chunk_size=CHUNK_SIZE):
+    """``stream_rates`` over a JSON file on disk."""
+    with open(path, 'rb') as handle:
+        return stream_rates(iter(lambda: handle.read(chunk_size), b''), symbols, start, end)
@@ -0,0 +1,282 @@
+"""Local, incrementally updated store of daily exchange rates.
+
+The store keeps every business day it has already downloaded and remembers
+the date it was last synced through, so a restart only asks the API for the
+days that are missing.
+
+Rates are kept in a binary columnar layout that can be memory-mapped
+read-only, so every gunicorn worker shares the same page-cache pages instead
+of parsing and holding a private copy::
+
+    rate_store/
+        CURRENT             name of the live snapshot, e.g. "v000012"
+        .lock               flock'd by whichever worker is updating
+        v000012/
+            dates.npy       datetime64[D], one entry per business day
+            rates.npy       float64 (days x symbols), column-major
+            meta.json       base, symbols, synced_through
+
+Updates take the exclusive lock, write a complete new snapshot directory and
+then atomically replace ``CURRENT``, so readers never see a half-written
+snapshot. CSV is only an export format (``export_csv``).
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from rate_matrix import RateMatrix, day_ordinals
+
+try:
+    import fcntl
+except ImportError:  # Windows: no gunicorn there, the dev server is single-process
+    fcntl = None
+
+# Superseded snapshots kept around for readers that still have them mapped
+KEEP_SNAPSHOTS = 2
+
+
+class RateStore:
+    def __init__(self, path, base='USD'):
+        self.path = path
+        self.base = base
+        self.lock_path = os.path.join(path, '.lock')
+        self.current_path = os.path.join(path, 'CURRENT')
+
+    @contextmanager
+    def lock(self):
+        """Hold the store's exclusive write lock (blocks until it is free)."""
+        os.makedirs(self.path, exist_ok=True)
+        with open(self.lock_path, 'a') as handle:
+            if fcntl is not None:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+    def version(self):
+        """Name of the live snapshot, or None if the store is empty."""
+        try:
+            with open(self.current_path) as handle:
+                return handle.read().strip() or None
+        except OSError:
+            return None
+
+    def meta(self, version=None):
+        version = version or self.version()
+        if version is None:
+            return None
+        with open(os.path.join(self.path, version, 'meta.json')) as handle:
+            return json.load(handle)
+
+    def load_arrays(self, version=None):
+        """Return ``(dates, rates, meta)`` memory-mapped read-only, or None if empty."""
+        version = version or self.version()
+        if version is None:
+            return None
+        snapshot = os.path.join(self.path, version)
+        dates = np.load(os.path.join(snapshot, 'dates.npy'), mmap_mode='r')
+        rates = np.load(os.path.join(snapshot, 'rates.npy'), mmap_mode='r')
+        return dates, rates, self.meta(version)
+
+    def load(self, version=None):
+        """Return the stored rates sorted by ``Date``, or None if the store is empty.
+
+        The symbol columns are backed directly by the memory-mapped array; no
+        parsing or copying happens here.
+        """
+        arrays = self.load_arrays(version)
+        if arrays is None:
+            return None
+        dates, rates, meta = arrays
+        # np.asarray drops the memmap subclass, which pandas would otherwise copy
+        df = pd.DataFrame(np.asarray(rates), columns=meta['symbols'], copy=False)
+        df.insert(0, 'Date', pd.DatetimeIndex(dates))
+        return df
+
+    def load_matrix(self, version=None):
+        """Return the stored rates as a ``RateMatrix`` over the mapped arrays, or None if empty."""
+        arrays = self.load_arrays(version)
+        if arrays is None:
+            return None
+        dates, rates, meta = arrays
+        return RateMatrix(day_ordinals(dates), np.asarray(rates), meta['symbols'])
+
+    def synced_through(self):
+        """Last calendar date the store is known to be complete up to."""
+        meta = self.meta()
+        return date.fromisoformat(meta['synced_through']) if meta and meta['synced_through'] else None
+
+    def update(self, fetch, start_date, end_date):
+        """Bring the store up to ``end_date`` and return its contents.
+
+        ``fetch(start, end)`` must return a frame with a ``Date`` column and one
+        column per symbol. Only the days after the last synced date are
+        requested; a worker that waited on the lock while another one fetched
+        finds the store already current and does no network work at all. A new
+        snapshot (and so a new version) is only written when new days arrive.
+
+        A frame with ``attrs['provisional']`` set (from a fallback provider) is
+        stored without advancing the synced-through date, so the next update asks
+        for those days again; whatever the primary provider then returns for
+        them replaces the provisional rows, including days it has no rate for.
+        """
+        with self.lock():
+            existing = self.load()
+            synced = self.synced_through()
+            if existing is None or existing.empty:
+                fetch_start = start_date
+            elif synced is None:
+                # Filled by a backfill only: carry on from the newest day it holds
+                fetch_start = existing['Date'].iloc[-1].date() + timedelta(days=1)
+            else:
+                fetch_start = synced + timedelta(days=1)
+            if fetch_start > end_date:
+                return existing
+
+            new = fetch(fetch_start, end_date)
+            provisional = new.attrs.get('provisional', False)
+            if new.empty and (existing is None or existing.empty):
+                return existing
+            if existing is not None and not existing.empty:
+                # Rows after the synced-through date are provisional. Upstream also
+                # re-sends the last business day for ranges without one
+                cutoff = pd.Timestamp(fetch_start - timedelta(days=1))
+                new = new[new['Date'] > cutoff]
+                stale = existing['Date'] > cutoff
+                if new.empty and (provisional or not stale.any()):
+                    return existing
+                if not provisional:
+                    existing = existing[~stale]
+            if provisional:
+                synced_through = fetch_start - timedelta(days=1)
+            else:
+                # Today's rates may not be published yet, so only call today complete once it is in
+                last_day = new['Date'].max().date() if not new.empty else None
+                synced_through = end_date if last_day == end_date else end_date - timedelta(days=1)
+            self._write(self._merge(existing, new), synced_through)
+            return self.load()
+
+    def merge(self, new):
+        """Merge a block of (possibly older) rates into the store under the write lock.
+
+        Values in ``new`` win, symbols or days it does not cover keep their
+        stored values, and the synced-through date is left as is.
+        """
+        self.merge_blocks([lambda: new])
+
+    def merge_blocks(self, blocks):
+        """Merge several blocks into the store as one new snapshot, as ``merge`` does.
+
+        Used by the backfill. ``blocks`` are zero-argument callables returning a
+        frame; each is called twice, first for its dates and symbols, then for
+        its values. The snapshot is filled through a memory map, so only one
+        block and one stored column are held in memory however long the
+        history is, and the history is written once rather than once per block.
+        Later blocks win over earlier ones.
+        """
+        if not blocks:
+            return
+        with self.lock():
+            arrays = self.load_arrays()
+            days = [arrays[0]] if arrays is not None else []
+            symbols = list(arrays[2]['symbols']) if arrays is not None else []
+            for block in blocks:
+                new = block()
+                days.append(new['Date'].to_numpy(dtype='datetime64[D]'))
+                symbols += [col for col in new.columns if col != 'Date' and col not in symbols]
+            dates = np.unique(np.concatenate(days))
+            columns = {symbol: i for i, symbol in enumerate(symbols)}
+
+            with self._snapshot(dates, symbols, self.synced_through()) as rates:
+                if arrays is not None:
+                    rows = np.searchsorted(dates, arrays[0])
+                    for j in range(arrays[1].shape[1]):
+                        rates[rows, j] = arrays[1][:, j]
+                for block in blocks:
+                    new = block()
+                    rows = np.searchsorted(dates, new['Date'].to_numpy(dtype='datetime64[D]'))
+                    for symbol in new.columns.drop('Date'):
+                        # Cell-wise, as in _merge: a missing value does not blank out a stored one
+                        values = new[symbol].to_numpy(dtype=np.float64)
+                        known = ~np.isnan(values)
+                        rates[rows[known], columns[symbol]] = values[known]
+
+    def export_csv(self, path):
+        """Write the live snapshot out as a ``Date,<symbols...>`` CSV file."""
+        df = self.load()
+        if df is None:
+            raise ValueError(f'Rate store {self.path!r} is empty')
+        df.to_csv(path, index=False, date_format='%Y-%m-%d')
+
+    @staticmethod
+    def _merge(existing, new):
+        if existing is None or existing.empty:
+            merged = new
+        else:
+            # Cell-wise, so a block with extra symbols does not blank out the others
+            merged = new.set_index('Date').combine_first(existing.set_index('Date'))
+            symbols = [*existing.columns.drop('Date'),
+                       *[col for col in new.columns if col not in existing.columns]]
+            merged = merged[symbols].reset_index()
+        return merged.sort_values('Date').reset_index(drop=True)
+
+    def _write(self, df, synced_through):
+        symbols = [col for col in df.columns if col != 'Date']
+        with self._snapshot(df['Date'].to_numpy(dtype='datetime64[D]'), symbols, synced_through) as rates:
+            rates[:] = df[symbols].to_numpy(dtype=np.float64)
+
+    @contextmanager
+    def _snapshot(self, dates, symbols, synced_through):
+        """Yield the NaN-filled, memory-mapped rates of a new snapshot, published on exit."""
+        os.makedirs(self.path, exist_ok=True)
+        current = self.version()
+        number = int(current[1:]) + 1 if current else 1
+        version = f'v{number:06d}'
+
+        tmp_dir = tempfile.mkdtemp(dir=self.path, prefix='.tmp-')
+        try:
+            np.save(os.path.join(tmp_dir, 'dates.npy'), dates)
+            rates = np.lib.format.open_memmap(os.path.join(tmp_dir, 'rates.npy'), mode='w+', dtype=np.float64,
+                                              shape=(len(dates), len(symbols)), fortran_order=True)
+            rates[:] = np.nan
+            yield rates
+            rates.flush()
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        with open(os.path.join(tmp_dir, 'meta.json'), 'w') as handle:
+            json.dump({
+                'base': self.base,
+                'symbols': symbols,
+                'synced_through': synced_through.isoformat() if synced_through else None
+            }, handle)
+        os.replace(tmp_dir, os.path.join(self.path, version))
+
+        fd, tmp_path = tempfile.mkstemp(dir=self.path, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as handle:
+            handle.write(version)
+        os.replace(tmp_path, self.current_path)
+        self._prune(number)
+
+    def _prune(self, live_number):
+        for name in os.listdir(self.path):
+            if name.startswith('v') and name[1:].isdigit() and int(name[1:]) <= live_number - KEEP_SNAPSHOTS:
+                # Open mmaps stay valid on POSIX; on Windows a mapped snapshot is retried next time
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Export the local rate store to CSV.')
+    parser.add_argument('output', help='CSV file to write')
+    parser.add_argument('--store', default='rate_store', help='rate store directory')
+    args = parser.parse_args()
+    RateStore(args.store).export_csv(args.output)
@@ -0,0 +1,145 @@
+"""Server-side paging, filtering and sorting for the rates table.
+
+The table is backed by the RateMatrix instead of shipping every row to the
+browser, so a DataTable in ``custom`` mode only ever receives one page. Two
+views are supported:
+
+* ``date_table`` -- every symbol on one day (as of that day: the latest
+  stored day on or before it),
+* ``history_table`` -- every stored day of one symbol, newest first.
+
+A table is a dict of equally long column arrays (views of the matrix where
+possible). ``table_page`` applies a DataTable ``filter_query`` and ``sort_by``
+with vectorized masks and ``np.lexsort``, then formats only the rows of the
+requested page. Dates are kept as day ordinals and only turned into strings
+for the page, or for the whole column when a text filter needs them.
+"""
+import math
+import re
+
+import numpy as np
+
+from currency_names import currency_names
+from rate_matrix import day_ordinal
+
+_TERM = re.compile(
+    r'^\s*\{(?P<column>[^}]+)\}\s*'
+    r'(?P<op>[si]?(?:contains|datestartswith|eq|ne|lt|le|gt|ge)\b|[si]?(?:[<>!]=?|=))\s*'
+    r'(?P<value>.*?)\s*$'
+)
+_SYMBOLS = {'=': 'eq', '!=': 'ne', '<': 'lt', '<=': 'le', '>': 'gt', '>=': 'ge'}
+_COMPARE = {'eq': np.equal, 'ne': np.not_equal, 'lt': np.less, 'le': np.less_equal,
+            'gt': np.greater, 'ge': np.greater_equal}
+
+# Columns holding day ordinals
+DATE_COLUMNS = ('Date',)
+
+
+def date_table(rates, day):
+    """Every symbol on the latest stored day on or before ``day``; returns ``(table, date string)``."""
+    row = max(rates.row_range(None, day).stop - 1, 0)
+    table = {
+        'Code': np.asarray(rates.symbols, dtype=object),
+        'Currency': np.asarray([currency_names.get(s, s) for s in rates.symbols], dtype=object),
+        'Rate': rates.values[row],
+    }
+    return table, str(np.datetime64(int(rates.days[row]), 'D'))
+
+
+def history_table(rates, symbol):
+    """Every stored day of ``symbol``, newest first, with the % change from the previous day."""
+    values = rates.column(symbol)[::-1]
+    change = np.full(len(values), np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change[:-1] = (values[:-1] / values[1:] - 1) * 100
+    return {'Date': rates.days[::-1], 'Rate': values, 'Change': change}
+
+
+def _date_strings(days):
+    return np.asarray(days, dtype=np.int64).astype('datetime64[D]').astype(str).astype(object)
+
+
+def _parse_value(raw):
+    # Kept as text: only a comparison on a numeric or date column turns it into a number
+    if len(raw) >= 2 and raw[0] == raw[-1] and raw[0] in ('"', "'", '`'):
+        return raw[1:-1].replace('\\' + raw[0], raw[0])
+    return raw
+
+
+def parse_filter(filter_query):
+    """``[(column, op, value, case_sensitive)]`` from a DataTable filter query; bad terms are skipped."""
+    terms = []
+    for part in (filter_query or '').split(' && '):
+        match = _TERM.match(part)
+        if not match or not match.group('value'):
+            continue
+        op = match.group('op')
+        # The table's filter UI prefixes every operator with s (case-sensitive) or i
+        case_sensitive = not op.startswith('i')
+        if op[0] in 'si':
+            op = op[1:]
+        terms.append((match.group('column'), _SYMBOLS.get(op, op), _parse_value(match.group('value')),
+                      case_sensitive))
+    return terms
+
+
+def _term_mask(values, column, op, value, case_sensitive):
+    if op in ('contains', 'datestartswith') or values.dtype == object:
+        text = _date_strings(values) if column in DATE_COLUMNS else values
+        needle = str(value) if case_sensitive else str(value).lower()
+        fold = (lambda s: s) if case_sensitive else (lambda s: s.lower())
+        if op == 'contains':
+            return np.fromiter((needle in fold(str(s)) for s in text), bool, len(text))
+        if op == 'datestartswith':
+            return np.fromiter((str(s).startswith(needle) for s in text), bool, len(text))
+        return _COMPARE[op](np.asarray([fold(str(s)) for s in text], dtype=object), needle)
+    try:
+        target = day_ordinal(str(value)) if column in DATE_COLUMNS else float(value)
+    except (TypeError, ValueError):
+        return np.zeros(len(values), dtype=bool)
+    with np.errstate(invalid='ignore'):
+        return _COMPARE[op](values, target)
+
+
+def _sort_key(values, descending):
+    if values.dtype == object:
+        values = np.unique(values.astype(str), return_inverse=True)[1]
+    values = np.asarray(values, dtype=np.float64)
+    return -values if descending else values  # NaN sorts last either way
+
+
+def table_page(table, filter_query=None, sort_by=None, page_current=0, page_size=20):
+    """One page of ``table`` as DataTable records; returns ``(records, page_current, page_count)``."""
+    length = len(next(iter(table.values())))
+    rows = None  # None: every row, in table order
+
+    terms = [term for term in parse_filter(filter_query) if term[0] in table]
+    if terms:
+        mask = np.ones(length, dtype=bool)
+        for column, op, value, case_sensitive in terms:
+            mask &= _term_mask(table[column], column, op, value, case_sensitive)
+        rows = np.flatnonzero(mask)
+
+    sort_by = [spec for spec in (sort_by or []) if spec.get('column_id') in table]
+    if sort_by:
+        rows = np.arange(length) if rows is None else rows
+        # lexsort's primary key is the last one
+        keys = [_sort_key(table[spec['column_id']][rows], spec.get('direction') == 'desc') for spec in sort_by]
+        rows = rows[np.lexsort(keys[::-1])]
+
+    total = length if rows is None else len(rows)
+    page_count = max(math.ceil(total / page_size), 1)
+    page_current = min(max(page_current or 0, 0), page_count - 1)
+    start = page_current * page_size
+    page_rows = slice(start, min(start + page_size, total)) if rows is None else rows[start:start + page_size]
+
+    columns = {}
+    for name, values in table.items():
+        values = values[page_rows]
+        if name in DATE_COLUMNS:
+            values = _date_strings(values)
+        elif values.dtype != object:
+            values = [None if math.isnan(v) else v for v in values.tolist()]
+        columns[name] = list(values)
+    records = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    return records, page_current, page_count
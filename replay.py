@@ -0,0 +1,358 @@
+"""Record and replay the upstream rate APIs for offline, repeatable runs.
+
+Responses from Frankfurter and open.er-api are captured once into a fixture
+directory (one JSON file per request) and served back from it afterwards,
+with optional injected latency and failures, so profiling and performance
+runs measure this code rather than the network. Two ways in:
+
+* in process -- with ``replay_dir`` set, ``build_providers`` mounts a
+  ``ReplayAdapter`` on its ``requests`` session::
+
+      FX_REPLAY_DIR=fixtures FX_REPLAY_MODE=record python currency_exchange_final_project.py
+      FX_REPLAY_DIR=fixtures FX_REPLAY_LATENCY_MS=200 FX_REPLAY_FAILURE_RATE=0.2 \\
+          python currency_exchange_final_project.py
+
+* a local stub server, for anything that only takes an API URL (such as
+  ``Uploads/exchange_rate_tracker.py``); ``/<host>/<path>`` answers for
+  ``https://<host>/<path>``::
+
+      python replay.py record --dir fixtures           # capture the configured endpoints
+      python replay.py serve --dir fixtures --port 8765 --latency-ms 50
+      FX_FRANKFURTER_URL=http://127.0.0.1:8765/api.frankfurter.app \\
+      FX_OPEN_ER_API_URL=http://127.0.0.1:8765/open.er-api.com/v6/latest python ...
+
+A request replays the fixture recorded for its exact URL or, failing that,
+the latest one recorded for the same URL with its dates wildcarded, so a
+history range captured one day still answers the next day's request.
+Failures are drawn from a seeded generator, so a run can be repeated. In
+process, the session's ``Retry`` policy runs on top of the replayed
+responses, so an injected 503 or dropped connection is retried with backoff
+exactly as a real one would be.
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit
+
+import requests
+from requests.adapters import BaseAdapter
+from urllib3.exceptions import MaxRetryError, ProtocolError, ReadTimeoutError
+from urllib3.response import HTTPResponse
+
+MODES = ('record', 'replay')
+
+_DATE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+
+class InjectedFailure(requests.exceptions.ConnectionError):
+    """A dropped connection injected by ``Faults``."""
+
+
+class MissingFixture(requests.exceptions.ConnectionError):
+    """No fixture was recorded for the URL; retrying cannot help."""
+
+
+def fixture_key(url):
+    """``host/path?sorted query`` of ``url``, the key a fixture is stored under."""
+    parts = urlsplit(url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return parts.netloc + parts.path + (f'?{query}' if query else '')
+
+
+def _route(key):
+    return _DATE.sub('*', key)
+
+
+class FixtureStore:
+    """Recorded responses in ``directory``, indexed by exact key and by dated route."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._exact = {}
+        self._routes = {}
+        self._lock = threading.Lock()
+        for root, _, names in os.walk(directory):
+            for name in sorted(names):
+                if name.endswith('.json'):
+                    with open(os.path.join(root, name)) as handle:
+                        self._index(json.load(handle))
+
+    def __len__(self):
+        return len(self._exact)
+
+    def _index(self, fixture):
+        with self._lock:
+            self._exact[fixture['key']] = fixture
+            route = _route(fixture['key'])
+            latest = self._routes.get(route)
+            if latest is None or latest['recorded_at'] <= fixture['recorded_at']:
+                self._routes[route] = fixture
+
+    def find(self, url):
+        key = fixture_key(url)
+        with self._lock:
+            return self._exact.get(key) or self._routes.get(_route(key))
+
+    def save(self, url, status, headers, body):
+        key = fixture_key(url)
+        fixture = {
+            'key': key,
+            'url': url,
+            'status': status,
+            'headers': headers,
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'body': body,
+        }
+        host, _, rest = key.partition('/')
+        slug = re.sub(r'[^A-Za-z0-9.]+', '-', rest).strip('-')[:60]
+        path = os.path.join(self.directory, host.replace(':', '_'), f"{slug}-{hashlib.sha1(key.encode()).hexdigest()[:8]}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written whole and renamed, so a replaying process never reads half a fixture
+        with open(path + '.tmp', 'w') as handle:
+            json.dump(fixture, handle, indent=1)
+        os.replace(path + '.tmp', path)
+        self._index(fixture)
+        return path
+
+
+class Faults:
+    """Injected latency and failures; ``failure_status`` 0 drops the connection instead."""
+
+    def __init__(self, latency_ms=0, failure_rate=0.0, failure_status=503, seed=0):
+        self.latency = latency_ms / 1000
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def fails(self):
+        if not self.failure_rate:
+            return False
+        with self._lock:
+            return self._random.random() < self.failure_rate
+
+
+# Response headers kept in a fixture; Location lets a recorded redirect replay as one
+KEPT_HEADERS = ('Content-Type', 'Location')
+
+
+def _response(request, status, headers, body):
+    response = requests.Response()
+    response.status_code = status
+    response.reason = HTTPStatus(status).phrase
+    response.headers.update(headers)
+    response.encoding = 'utf-8'
+    response._content = body.encode()
+    response._content_consumed = True  # iter_content serves the body from memory
+    response.url = request.url
+    response.request = request
+    return response
+
+
+class ReplayAdapter(BaseAdapter):
+    """``requests`` transport that records through ``upstream`` or replays from ``fixtures``.
+
+    ``retries`` is the urllib3 ``Retry`` applied to replayed responses (by
+    default the one ``upstream`` carries); recording goes through ``upstream``
+    and so through its own retries.
+    """
+
+    def __init__(self, fixtures, mode='replay', faults=None, upstream=None, retries=None):
+        super().__init__()
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode {mode!r}; expected one of {', '.join(MODES)}")
+        if mode == 'record' and upstream is None:
+            raise ValueError("Recording needs an upstream adapter")
+        self.fixtures = fixtures
+        self.mode = mode
+        self.faults = faults or Faults()
+        self.upstream = upstream
+        self.retries = retries if retries is not None else getattr(upstream, 'max_retries', None)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        if self.mode == 'record':
+            response = self.upstream.send(request, stream=False, timeout=timeout, verify=verify,
+                                          cert=cert, proxies=proxies)
+            if response.status_code < 400:
+                headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+                self.fixtures.save(request.url, response.status_code, headers,
+                                   response.content.decode(response.encoding or 'utf-8'))
+            return response
+        if self.retries is None:
+            return self._replay(request, timeout)
+
+        # The same loop HTTPAdapter runs through urllib3, over replayed responses
+        retries = self.retries
+        while True:
+            try:
+                response = self._replay(request, timeout)
+            except MissingFixture:
+                raise
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+                error = ReadTimeoutError(None, request.url, str(e)) \
+                    if isinstance(e, requests.exceptions.ReadTimeout) else ProtocolError(str(e))
+                try:
+                    retries = retries.increment(request.method, request.url, error=error)
+                except MaxRetryError:
+                    raise e
+                retries.sleep()
+                continue
+            has_retry_after = 'Retry-After' in response.headers
+            if not retries.is_retry(request.method, response.status_code, has_retry_after):
+                return response
+            raw = HTTPResponse(status=response.status_code, headers=dict(response.headers), preload_content=False)
+            try:
+                retries = retries.increment(request.method, request.url, response=raw)
+            except MaxRetryError as e:
+                if retries.raise_on_status:
+                    raise requests.exceptions.RetryError(e, request=request)
+                return response
+            retries.sleep(raw)
+
+    def _replay(self, request, timeout):
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and self.faults.latency > read_timeout:
+            time.sleep(read_timeout)
+            raise requests.exceptions.ReadTimeout(
+                f"Replayed latency of {self.faults.latency:.3f}s exceeds the {read_timeout}s timeout", request=request)
+        time.sleep(self.faults.latency)
+        if self.faults.fails():
+            if not self.faults.failure_status:
+                raise InjectedFailure("Injected connection failure", request=request)
+            return _response(request, self.faults.failure_status, {'Content-Type': 'text/plain'}, 'Injected failure')
+
+        fixture = self.fixtures.find(request.url)
+        if fixture is None:
+            raise MissingFixture(
+                f"No fixture for {fixture_key(request.url)} in {self.fixtures.directory!r}", request=request)
+        return _response(request, fixture['status'], fixture['headers'], fixture['body'])
+
+    def close(self):
+        if self.upstream is not None:
+            self.upstream.close()
+
+
+def make_adapter(config, upstream=None):
+    """``ReplayAdapter`` configured by the ``replay_*`` settings."""
+    faults = Faults(config['replay_latency_ms'], config['replay_failure_rate'],
+                    config['replay_failure_status'], config['replay_seed'])
+    return ReplayAdapter(FixtureStore(config['replay_dir']), config['replay_mode'], faults, upstream)
+
+
+def install(session, config):
+    """Route ``session`` through record/replay when ``replay_dir`` is set; returns ``session``."""
+    if config['replay_dir']:
+        adapter = make_adapter(config, upstream=session.get_adapter('https://'))
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+    return session
+
+
+# ------------------------------ Stub server ------------------------------ #
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        # /<host>/<path>?<query> stands in for https://<host>/<path>?<query>
+        request = requests.Request('GET', 'https:/' + self.path).prepare()
+        try:
+            response = self.server.adapter.send(request, timeout=None)
+        except InjectedFailure:
+            self.close_connection = True  # hang up without an answer
+            return
+        except requests.exceptions.ConnectionError as e:
+            self._reply(404, {'Content-Type': 'text/plain'}, str(e).encode())
+            return
+        headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        if 'Location' in headers:
+            # Keep a recorded redirect on this server: https://<host>/... -> /<host>/...
+            headers['Location'] = '/' + urljoin(request.url, headers['Location']).split('://', 1)[1]
+        self._reply(response.status_code, headers, response.content)
+
+    def _reply(self, status, headers, body):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        print(f"replay: {self.address_string()} {format % args}")
+
+
+def serve(config, host='127.0.0.1', port=8765):
+    """Serve the fixtures over HTTP until interrupted (records through to upstream in record mode)."""
+    from providers import make_session
+
+    upstream = make_session(retries=config['fetch_retries']).get_adapter('https://') \
+        if config['replay_mode'] == 'record' else None
+    server = ThreadingHTTPServer((host, port), _StubHandler)
+    server.adapter = make_adapter(config, upstream)
+    print(f"Replaying {len(server.adapter.fixtures)} fixtures from {config['replay_dir']!r} "
+          f"({config['replay_mode']}) on http://{host}:{server.server_port}/<host>/<path>")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def record(config):
+    """Fetch the configured history once from each HTTP provider, recording the responses."""
+    from providers import build_providers
+
+    chain = build_providers({**config, 'replay_mode': 'record', 'providers': ['frankfurter', 'open_er_api']})
+    end = date.today()
+    ranges = {'frankfurter': (end - timedelta(days=config['history_days']), end),
+              'open_er_api': (end - timedelta(days=7), end)}
+    for provider in chain.providers:
+        start, stop = ranges[provider.name]
+        try:
+            rates = provider.fetch_range(start, stop, config['base'], config['symbols'])
+            print(f"Recorded {provider.name}: {len(rates)} days")
+        except Exception as e:
+            print(f"Could not record {provider.name}: {e}")
+    print(f"{len(make_adapter(config).fixtures)} fixtures in {config['replay_dir']!r}")
+
+
+def main(argv=None):
+    from config import load_config
+
+    parser = argparse.ArgumentParser(description='Record or serve upstream API fixtures.')
+    parser.add_argument('command', choices=('record', 'serve'))
+    parser.add_argument('--dir', help='fixture directory (default: FX_REPLAY_DIR or fixtures)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--record', action='store_true', help='serve: proxy to upstream, recording every response')
+    parser.add_argument('--latency-ms', type=int, help='serve: delay per request')
+    parser.add_argument('--failure-rate', type=float, help='serve: share of requests that fail')
+    parser.add_argument('--failure-status', type=int, help='serve: status of a failure, 0 to hang up')
+    args = parser.parse_args(argv)
+
+    overrides = {'replay_dir': args.dir or os.environ.get('FX_REPLAY_DIR') or 'fixtures'}
+    if args.record:
+        overrides['replay_mode'] = 'record'
+    for key, value in (('replay_latency_ms', args.latency_ms), ('replay_failure_rate', args.failure_rate),
+                       ('replay_failure_status', args.failure_status)):
+        if value is not None:
+            overrides[key] = value
+    config = load_config(overrides)
+    if args.command == 'record':
+        record(config)
+    else:
+        serve(config, args.host, args.port)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+"""Cache shared by every gunicorn worker for serialized figures and analytics.
+
+Values are bytes keyed by strings that include the data version, so a refresh
+simply stops hitting the old entries and the size bound evicts them. Two
+backends implement the same small interface:
+
+* ``SQLiteCache`` -- a single file on local disk (WAL mode), good for one host,
+* ``RedisCache``  -- any Redis-compatible server (Redis, Valkey, fakeredis).
+
+``get_or_compute`` adds stampede protection: the first worker to miss takes a
+short-lived lock and computes the value, the others poll until it shows up
+instead of all building the same figure at once.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from metrics import CACHE_REQUESTS
+
+
+class SharedCache:
+    def get(self, key):
+        raise NotImplementedError
+
+    def set(self, key, value):
+        raise NotImplementedError
+
+    def _acquire(self, key, ttl):
+        raise NotImplementedError
+
+    def _release(self, key):
+        raise NotImplementedError
+
+    def get_or_compute(self, key, compute, lock_ttl=30, poll_interval=0.05):
+        """Return the cached bytes for ``key``, computing them in at most one worker."""
+        value = self.get(key)
+        if value is not None:
+            CACHE_REQUESTS.inc(cache='shared', result='hit')
+            return value
+        CACHE_REQUESTS.inc(cache='shared', result='miss')
+        deadline = time.monotonic() + lock_ttl
+        while True:
+            if self._acquire(key, lock_ttl):
+                try:
+                    value = self.get(key)
+                    if value is None:
+                        value = compute()
+                        self.set(key, value)
+                    return value
+                finally:
+                    self._release(key)
+            time.sleep(poll_interval)
+            value = self.get(key)
+            if value is not None:
+                return value
+            if time.monotonic() > deadline:
+                # The lock holder is stuck or gone; do the work rather than wait forever
+                value = compute()
+                self.set(key, value)
+                return value
+
+
+class SQLiteCache(SharedCache):
+    """Size-bounded LRU cache in one SQLite file shared by the workers on a host."""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._held = {}
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE IF NOT EXISTS entries '
+                       '(key TEXT PRIMARY KEY, value BLOB, size INTEGER, accessed REAL)')
+            db.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+            db.execute('CREATE TABLE IF NOT EXISTS locks (key TEXT PRIMARY KEY, expires REAL)')
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.db = db
+        return db
+
+    def get(self, key):
+        db = self._connect()
+        row = db.execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        db.execute('UPDATE entries SET accessed = ? WHERE key = ?', (time.time(), key))
+        return row[0]
+
+    def set(self, key, value):
+        db = self._connect()
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            db.execute('INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)',
+                       (key, value, len(value), time.time()))
+            total = db.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(db, total - self.max_bytes)
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+
+    @staticmethod
+    def _evict(db, excess):
+        freed = 0
+        victims = []
+        for key, size in db.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if freed >= excess:
+                break
+            victims.append((key,))
+            freed += size
+        db.executemany('DELETE FROM entries WHERE key = ?', victims)
+
+    def _acquire(self, key, ttl):
+        now = time.time()
+        db = self._connect()
+        cursor = db.execute(
+            'INSERT INTO locks (key, expires) VALUES (?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET expires = excluded.expires WHERE locks.expires < ?',
+            (key, now + ttl, now)
+        )
+        if cursor.rowcount == 1:
+            self._held[key] = now + ttl
+            return True
+        return False
+
+    def _release(self, key):
+        expires = self._held.pop(key, None)
+        # Only delete our own lock; it may have expired and been taken over
+        if expires is not None:
+            self._connect().execute('DELETE FROM locks WHERE key = ? AND expires = ?', (key, expires))
+
+
+class RedisCache(SharedCache):
+    """Size-bounded LRU cache on a Redis-compatible server.
+
+    Only plain commands (GET/SET NX PX/DEL, WATCH/MULTI, sorted sets, hashes,
+    INCRBY) are used, so fakeredis works as a local stand-in.
+    """
+
+    def __init__(self, client, max_bytes=256 * 1024 * 1024, prefix='fx-dashboard:'):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.prefix = prefix
+        self._lru = f'{prefix}meta:lru'
+        self._sizes = f'{prefix}meta:sizes'
+        self._total = f'{prefix}meta:bytes'
+        self._tokens = {}
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is not None:
+            self.client.zadd(self._lru, {key: time.time()})
+        return value
+
+    def set(self, key, value):
+        previous = self.client.hget(self._sizes, key)
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, value)
+        pipe.zadd(self._lru, {key: time.time()})
+        pipe.hset(self._sizes, key, len(value))
+        pipe.incrby(self._total, len(value) - int(previous or 0))
+        total = pipe.execute()[-1]
+        if total > self.max_bytes:
+            self._evict(total - self.max_bytes)
+
+    def _evict(self, excess):
+        freed = 0
+        while freed < excess:
+            oldest = self.client.zrange(self._lru, 0, 15)
+            if not oldest:
+                break
+            for raw in oldest:
+                key = raw.decode() if isinstance(raw, bytes) else raw
+                size = int(self.client.hget(self._sizes, key) or 0)
+                pipe = self.client.pipeline()
+                pipe.delete(self.prefix + key)
+                pipe.zrem(self._lru, key)
+                pipe.hdel(self._sizes, key)
+                pipe.incrby(self._total, -size)
+                pipe.execute()
+                freed += size
+                if freed >= excess:
+                    break
+
+    def _acquire(self, key, ttl):
+        token = uuid.uuid4().hex
+        if self.client.set(f'{self.prefix}lock:{key}', token, nx=True, px=int(ttl * 1000)):
+            self._tokens[key] = token
+            return True
+        return False
+
+    def _release(self, key):
+        from redis.exceptions import WatchError
+
+        lock_key = f'{self.prefix}lock:{key}'
+        token = self._tokens.pop(key, None)
+        if token is None:
+            return
+        # Only delete our own lock; it may have expired and been taken over. WATCH makes
+        # the DEL fail if the lock changes (or expires) after we read it
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(lock_key)
+                held = pipe.get(lock_key)
+                if held is not None and (held.decode() if isinstance(held, bytes) else held) == token:
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+            except WatchError:
+                pass  # taken over in between: it is not ours to delete
+
+
+def make_shared_cache(config):
+    """Shared cache for ``config['cache_url']`` (sqlite:///path or redis://...), or None."""
+    url = config['cache_url']
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteCache(url[len('sqlite:///'):], max_bytes=config['cache_max_bytes'])
+    if url.startswith(('redis://', 'rediss://', 'unix://')):
+        import redis  # optional dependency, only needed for this backend
+        return RedisCache(redis.Redis.from_url(url), max_bytes=config['cache_max_bytes'])
+    raise ValueError(f"Unsupported cache_url {url!r}")
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from analytics import Analytics
+from rate_data import build_analytics
+from rate_store import RateStore
+from synthetic import synthetic_rates
+
+SYMBOLS = ['EUR', 'GBP', 'JPY']
+WINDOWS = (5, 21)
+
+
+@pytest.fixture(scope='module')
+def rates():
+    frame = synthetic_rates(date(2023, 1, 1), date(2024, 6, 30), SYMBOLS, seed=3)
+    frame.loc[100:104, 'GBP'] = np.nan  # a gap, as for a currency missing a few days
+    return frame
+
+
+def assert_same(extended, full):
+    assert extended.symbols == full.symbols and extended.windows == full.windows
+    assert extended.dates.equals(full.dates)
+    np.testing.assert_array_equal(extended.days, full.days)
+    np.testing.assert_array_equal(extended.values, full.values)
+    np.testing.assert_allclose(extended.returns, full.returns, equal_nan=True)
+    for window in full.windows:
+        np.testing.assert_allclose(extended.volatility[window], full.volatility[window],
+                                   rtol=1e-9, atol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(extended.drawdown, full.drawdown, equal_nan=True)
+    np.testing.assert_allclose(extended.period_returns(), full.period_returns(), equal_nan=True)
+    assert extended.period_labels == full.period_labels
+
+
+@pytest.mark.parametrize('known', [30, 102, 300])
+def test_extend_matches_a_full_rebuild(rates, known):
+    dates, values = rates['Date'], rates[SYMBOLS].to_numpy()
+    full = Analytics(dates, values, SYMBOLS, windows=WINDOWS)
+    extended = Analytics(dates[:known], values[:known], SYMBOLS, windows=WINDOWS).extend(
+        dates[known:], values[known:])
+    assert_same(extended, full)
+
+
+def test_repeated_single_day_extends_match_a_full_rebuild(rates):
+    dates, values = rates['Date'], rates[SYMBOLS].to_numpy()
+    full = Analytics(dates, values, SYMBOLS, windows=WINDOWS)
+    analytics = Analytics(dates[:len(dates) - 25], values[:len(dates) - 25], SYMBOLS, windows=WINDOWS)
+    for row in range(len(dates) - 25, len(dates)):
+        analytics = analytics.extend(dates[row:row + 1], values[row:row + 1])
+    assert_same(analytics, full)
+
+
+def test_rewritten_days_are_not_extended(rates):
+    dates, values = rates['Date'], rates[SYMBOLS].to_numpy()
+    previous = Analytics(dates, values, SYMBOLS, windows=WINDOWS)
+    changed = values.copy()
+    changed[-1, 0] *= 5
+    assert previous.can_extend(dates, SYMBOLS, values)
+    assert not previous.can_extend(dates, SYMBOLS, changed)
+
+
+def test_provisional_rows_confirmed_by_the_primary_are_rebuilt(tmp_path):
+    store = RateStore(str(tmp_path), base='USD')
+    history = synthetic_rates(date(2024, 1, 1), date(2024, 6, 28), SYMBOLS, seed=3)
+    friday = history['Date'].iloc[-1].date()
+    monday, tuesday = friday + timedelta(days=3), friday + timedelta(days=4)
+    store.update(lambda start, end: history, history['Date'].iloc[0].date(), friday)
+
+    provisional = pd.DataFrame({'Date': pd.to_datetime([monday]), **{s: [2.0] for s in SYMBOLS}})
+    provisional.attrs['provisional'] = True
+    store.update(lambda start, end: provisional, friday, monday)
+    first = build_analytics(store.load_matrix(), WINDOWS)
+
+    confirmed = pd.DataFrame({'Date': pd.to_datetime([monday, tuesday]), **{s: [10.0, 11.0] for s in SYMBOLS}})
+    store.update(lambda start, end: confirmed, friday, tuesday)
+    rates = store.load_matrix()
+    rebuilt = build_analytics(rates, WINDOWS, previous=first)
+    assert rebuilt.values[-2, 0] == 10.0
+    assert_same(rebuilt, Analytics(rates.dates, rates.values, rates.symbols, windows=WINDOWS))
+
+    # Same days and values again: the previous analytics are reused as they are
+    assert build_analytics(store.load_matrix(), WINDOWS, previous=rebuilt) is rebuilt
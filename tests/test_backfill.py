@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+from datetime import date
+
+import pandas as pd
+import pytest
+
+import backfill
+from config import load_config
+from providers import ProviderChain, RateProvider, SyntheticProvider
+from rate_store import RateStore
+
+
+class Slow(RateProvider):
+    """Answers one day after ``delay`` seconds, counting the fetches running at once."""
+    name = 'slow'
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.running = 0
+        self.most = 0
+        self._lock = threading.Lock()
+
+    def fetch_range(self, start, end, base, symbols):
+        with self._lock:
+            self.running += 1
+            self.most = max(self.most, self.running)
+        time.sleep(self.delay)
+        with self._lock:
+            self.running -= 1
+        return pd.DataFrame({'Date': pd.to_datetime([start]), **{s: [1.0] for s in symbols}})
+
+
+def fetch_at_once(chain, calls):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(chain.fetch_range(date(2020, 1, 1), date(2020, 1, 2),
+                                                                               'USD', ['EUR'])))
+               for _ in range(calls)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    return results
+
+
+def test_chain_runs_as_many_ranges_as_its_concurrency():
+    provider = Slow(0.2)
+    assert len(fetch_at_once(ProviderChain([provider], concurrency=4), 4)) == 4
+    assert provider.most == 4
+
+
+def test_chain_timeout_starts_when_the_fetch_does():
+    # Three queued 0.2 s fetches on one thread: the last one starts after 0.4 s
+    results = fetch_at_once(ProviderChain([Slow(0.2)], timeout=0.3), 3)
+    assert len(results) == 3
+
+
+@pytest.fixture
+def config(tmp_path):
+    return load_config({'providers': ['synthetic'], 'symbols': ['EUR', 'JPY'], 'base': 'USD'})
+
+
+class Interrupted(BaseException):
+    pass
+
+
+def test_interrupted_run_resumes(tmp_path, config, monkeypatch):
+    start, end = date(2019, 1, 1), date(2023, 12, 31)
+    reference = {**config, 'store_path': str(tmp_path / 'reference')}
+    assert backfill.backfill(reference, start, end, workers=2) == []
+
+    fetched = []
+    interrupt = [True]
+    fetch_range = SyntheticProvider.fetch_range
+
+    def interrupt_in_2021(self, chunk_start, chunk_end, base, symbols):
+        fetched.append(chunk_start)
+        if chunk_start.year == 2021 and interrupt:
+            interrupt.clear()  # only the first run is interrupted
+            raise Interrupted()
+        return fetch_range(self, chunk_start, chunk_end, base, symbols)
+
+    monkeypatch.setattr(SyntheticProvider, 'fetch_range', interrupt_in_2021)
+    resumed = {**config, 'store_path': str(tmp_path / 'store')}
+    with pytest.raises(Interrupted):
+        backfill.backfill(resumed, start, end, workers=1)
+    assert fetched == [date(2019, 1, 1), date(2020, 1, 1), date(2021, 1, 1)]
+    store = RateStore(resumed['store_path'])
+    assert store.version() is None  # staged, not merged yet
+    assert len(os.listdir(os.path.join(store.path, 'backfill-chunks'))) == 2
+
+    fetched.clear()
+    assert backfill.backfill(resumed, start, end, workers=1) == []
+    assert fetched == [date(2021, 1, 1), date(2022, 1, 1), date(2023, 1, 1)]
+    assert os.listdir(os.path.join(store.path, 'backfill-chunks')) == []
+    pd.testing.assert_frame_equal(store.load(), RateStore(reference['store_path']).load())
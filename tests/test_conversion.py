@@ -0,0 +1,55 @@
+import pytest
+from flask import Flask
+
+import conversion
+from config import load_config
+from rate_data import DataManager
+
+
+@pytest.fixture(scope='module')
+def client(tmp_path_factory):
+    config = load_config({'providers': ['synthetic'], 'symbols': ['EUR', 'JPY'], 'history_days': 60,
+                          'store_path': str(tmp_path_factory.mktemp('store')), 'warm_up': False,
+                          'refresh_interval': 0, 'cache_url': '', 'prebuild_workers': 0,
+                          'convert_max_rows': 3})
+    server = Flask(__name__)
+    conversion.install(server, config, DataManager(config))
+    return server.test_client()
+
+
+@pytest.mark.parametrize('body, message', [
+    ({'rows': 5}, "'rows' must be a list"),
+    ({'rows': None}, "'rows' must be a list"),
+    ({'date': '2025-01-02', 'currency': ['EUR'], 'amount': [1]}, "'date' must be a list"),
+    ('EUR', 'expected a JSON object or a list of rows'),
+    ([1, 2], 'every row must be an object'),
+    ({'date': ['2025-01-02']}, "missing column 'currency'"),
+])
+def test_malformed_json_is_a_bad_request(client, body, message):
+    response = client.post('/api/convert', json=body)
+    assert response.status_code == 400
+    assert message in response.get_json()['error']
+
+
+def test_non_utf8_csv_is_a_bad_request(client):
+    response = client.post('/api/convert', data='date,currency,amount\n2025-01-02,€,1\n'.encode('cp1252'),
+                           content_type='text/csv')
+    assert response.status_code == 400
+    assert 'UTF-8' in response.get_json()['error']
+
+
+def test_too_many_rows(client):
+    response = client.post('/api/convert', json={'date': ['2025-01-02'] * 4, 'currency': ['EUR'] * 4,
+                                                 'amount': [1] * 4})
+    assert response.status_code == 413
+
+
+def test_rows_keep_their_keys(client):
+    response = client.post('/api/convert', json={'to': 'USD', 'rows': [
+        {'id': 7, 'date': '2099-01-01', 'currency': 'EUR', 'amount': 10},
+        {'id': 8, 'date': '2099-01-01', 'currency': 'XXX', 'amount': 10},
+    ]})
+    assert response.status_code == 200
+    first, second = response.get_json()['rows']
+    assert first['id'] == 7 and first['error'] is None and first['converted'] > 0
+    assert second['error'] == 'unknown currency' and second['converted'] is None
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from cross_rates import CrossRateEngine, cross_table
+from rate_matrix import RateMatrix
+
+
+@pytest.fixture
+def rates():
+    # EUR, GBP and JPY per 1 USD on three days
+    frame = pd.DataFrame({'Date': pd.to_datetime(['2025-01-02', '2025-01-03', '2025-01-06']),
+                          'EUR': [0.90, 0.92, 0.95], 'GBP': [0.80, 0.79, 0.78], 'JPY': [150.0, 151.0, 152.0]})
+    return RateMatrix.from_frame(frame)
+
+
+def test_cross_table_for_one_day():
+    table = cross_table([1.0, 0.9, 150.0], ['USD', 'EUR', 'JPY'])
+    assert table.index.name == 'base' and list(table.columns) == ['USD', 'EUR', 'JPY']
+    assert table.loc['EUR', 'JPY'] == pytest.approx(150.0 / 0.9)
+    assert table.loc['JPY', 'USD'] == pytest.approx(1 / 150.0)
+    np.testing.assert_allclose(np.diag(table.to_numpy()), 1.0)
+
+
+def test_engine_cross_table_defaults_to_the_latest_day(rates):
+    engine = CrossRateEngine(rates, version='v000001')
+    assert engine.cross_table().loc['GBP', 'EUR'] == pytest.approx(0.95 / 0.78)
+    assert engine.cross_table(0).loc['USD', 'JPY'] == pytest.approx(150.0)
+
+
+def test_rebased_matches_pairs(rates):
+    engine = CrossRateEngine(rates, version='v000001')
+    rebased = engine.rebased('EUR')
+    assert rebased.symbols == ['USD', 'EUR', 'GBP', 'JPY']
+    np.testing.assert_allclose(rebased.column('EUR'), 1.0)
+    for quote in ('USD', 'GBP', 'JPY'):
+        np.testing.assert_allclose(rebased.column(quote), engine.pair('EUR', quote).column(quote))
+
+
+def test_rebased_is_cached_per_base_and_version(rates):
+    engine = CrossRateEngine(rates, version='v000001', maxsize=2)
+    eur = engine.rebased('EUR')
+    assert engine.rebased('EUR') is eur
+    engine.rebased('GBP')
+    engine.rebased('JPY')  # evicts EUR, the least recently used
+    assert engine.rebased('EUR') is not eur
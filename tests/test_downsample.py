@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from downsample import downsample_line, downsample_wide, lttb, minmax_indices, narrow_window, visible_range
+from rate_matrix import RateMatrix
+
+WINDOW = (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-12-31'))
+
+
+@pytest.fixture
+def walk():
+    rng = np.random.default_rng(7)
+    return np.cumsum(rng.normal(size=5000))
+
+
+@pytest.mark.parametrize('n_out', [1, 2, 3, 10, 500])
+def test_lttb_bound_and_endpoints(walk, n_out):
+    picked = lttb(np.arange(len(walk)), walk, n_out)
+    assert len(picked) == n_out
+    assert (np.diff(picked) > 0).all()
+    assert picked[-1] == len(walk) - 1
+    if n_out >= 2:
+        assert picked[0] == 0
+
+
+def test_lttb_keeps_a_spike(walk):
+    walk[2345] = 1000
+    assert 2345 in lttb(np.arange(len(walk)), walk, 100)
+
+
+def test_lttb_short_series_is_kept_whole():
+    np.testing.assert_array_equal(lttb(np.arange(5), np.ones(5), 10), np.arange(5))
+
+
+@pytest.mark.parametrize('n_buckets', [1, 4, 100])
+def test_minmax_bound_endpoints_and_extremes(walk, n_buckets):
+    values = np.column_stack([walk, -walk])
+    for col, picked in enumerate(minmax_indices(values, n_buckets)):
+        assert len(picked) <= 2 * n_buckets + 2
+        assert (np.diff(picked) > 0).all()
+        assert picked[0] == 0 and picked[-1] == len(walk) - 1
+        assert np.argmax(values[:, col]) in picked and np.argmin(values[:, col]) in picked
+
+
+def test_minmax_skips_nan_gaps(walk):
+    values = walk.copy()
+    values[:100] = np.nan  # a currency that starts later
+    values[2000:2600] = np.nan  # and a gap in the middle
+    values[-50:] = np.nan
+    picked = minmax_indices(values, 50)[0]
+    assert not np.isnan(values[picked]).any()
+    assert picked[0] == 100 and picked[-1] == len(values) - 51
+
+    all_nan = minmax_indices(np.full(1000, np.nan), 10)[0]
+    assert len(all_nan) == 0
+
+
+def test_downsample_line_drops_nan_gaps():
+    days = np.arange(np.datetime64('2024-01-01'), np.datetime64('2024-12-31')).astype(np.int64)
+    values = np.sin(np.arange(len(days)) / 10)
+    values[50:80] = np.nan
+    frame = downsample_line(RateMatrix(days, values[:, np.newaxis], ['EUR']), 'EUR', 40)
+    assert len(frame) == 40 and not frame['EUR'].isna().any()
+    assert frame['Week_start'].iloc[0] == pd.Timestamp('2024-01-01')
+    assert frame['Week_start'].iloc[-1] == pd.Timestamp('2024-12-30')
+
+
+def test_downsample_wide_stays_within_max_points(walk):
+    days = np.arange(np.datetime64('2000-01-01'), np.datetime64('2000-01-01') + len(walk)).astype(np.int64)
+    frame = downsample_wide(RateMatrix(days, np.column_stack([walk, walk * 2]), ['EUR', 'GBP']), 100, 'Rate')
+    assert frame.groupby('Currency').size().max() <= 100
+
+
+@pytest.mark.parametrize('relayout, expected', [
+    (None, None),
+    ({}, None),
+    ({'autosize': True}, None),
+    ({'xaxis.autorange': True}, None),
+    ({'xaxis.autorange': True, 'xaxis.showspikes': False}, None),
+    ({'yaxis.range[0]': 1, 'yaxis.range[1]': 2}, None),
+    ({'xaxis.range[0]': '2024-03-01', 'xaxis.range[1]': '2024-04-15 12:00:00.5'},
+     (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-04-15 12:00:00.5'))),
+    ({'xaxis.range': ['2024-03-01', '2024-04-15']}, (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-04-15'))),
+    ({'xaxis.range[0]': 'not a date', 'xaxis.range[1]': '2024-04-15'}, None),
+    ({'xaxis.range[0]': '2024-03-01'}, None),
+])
+def test_visible_range(relayout, expected):
+    assert visible_range(relayout) == expected
+
+
+@pytest.mark.parametrize('zoom, expected', [
+    (None, WINDOW),
+    ((pd.Timestamp('2024-03-01'), pd.Timestamp('2024-04-01')),
+     (pd.Timestamp('2024-03-01'), pd.Timestamp('2024-04-01'))),
+    # Zoomed out past the selected range: clipped to it
+    ((pd.Timestamp('2023-06-01'), pd.Timestamp('2025-06-01')), WINDOW),
+    ((pd.Timestamp('2023-06-01'), pd.Timestamp('2024-02-01')), (WINDOW[0], pd.Timestamp('2024-02-01'))),
+    # Entirely outside it (panned away): the selected range
+    ((pd.Timestamp('2026-01-01'), pd.Timestamp('2026-02-01')), WINDOW),
+    ((pd.Timestamp('2024-05-01'), pd.Timestamp('2024-05-01')), WINDOW),
+])
+def test_narrow_window(zoom, expected):
+    assert narrow_window(WINDOW, zoom) == expected
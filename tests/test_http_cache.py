@@ -0,0 +1,73 @@
+import gzip
+
+import pytest
+from flask import Flask
+
+import http_cache
+
+
+@pytest.fixture
+def app():
+    """A Flask app whose layout, like the dashboard's, is a placeholder until the data is live."""
+    server = Flask(__name__)
+    state = {'version': None, 'goes_live': None, 'builds': 0}
+
+    @server.route('/_dash-layout')
+    def layout():
+        state['builds'] += 1
+        if state['version'] is None:
+            body = '{"loading": "Loading exchange rates..."}'
+            # The warm-up thread finishes while the placeholder is being returned
+            state['version'] = state.pop('goes_live', None)
+            return server.response_class(body, mimetype='application/json')
+        return server.response_class('{"rates": "%s"}' % ('x' * 2000), mimetype='application/json')
+
+    http_cache.install(server, lambda: state['version'])
+    return server, state
+
+
+def test_layout_is_cached_and_tagged_per_version(app):
+    server, state = app
+    state['version'] = 'v000001'
+    client = server.test_client()
+    first = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip'})
+    assert first.headers['Content-Encoding'] == 'gzip'
+    assert first.headers['ETag'].startswith('"v000001-')
+    assert b'rates' in gzip.decompress(first.data)
+
+    again = client.get('/_dash-layout', headers={'Accept-Encoding': 'gzip', 'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+    assert state['builds'] == 1
+
+    state['version'] = 'v000002'
+    assert client.get('/_dash-layout').headers['ETag'].startswith('"v000002-')
+    assert state['builds'] == 2
+
+
+def test_placeholder_built_as_the_data_goes_live_is_not_cached(app):
+    server, state = app
+    state['goes_live'] = 'v000001'
+    client = server.test_client()
+
+    loading = client.get('/_dash-layout')
+    assert b'Loading' in loading.data
+    assert 'ETag' not in loading.headers
+    assert state['version'] == 'v000001'
+
+    live = client.get('/_dash-layout')
+    assert b'rates' in live.data
+    assert live.headers['ETag'].startswith('"v000001-')
+    assert state['builds'] == 2
+
+
+def test_layout_built_during_a_refresh_is_not_cached(app):
+    server, state = app
+    state['version'] = 'v000001'
+    client = server.test_client()
+
+    @server.before_request
+    def refresh_lands():
+        state['version'] = 'v000002'
+
+    response = client.get('/_dash-layout')
+    assert response.status_code == 200 and 'ETag' not in response.headers
@@ -0,0 +1,35 @@
+from flask import Flask
+
+import metrics
+from config import load_config
+
+
+def test_label_values_are_escaped():
+    counter = metrics.Counter('fx_test_escape_total', 'test', ['name'])
+    counter.inc(name='x"1\nfoo\\bar')
+    try:
+        lines = counter.collect([('pid', 1)])
+    finally:
+        metrics.REGISTRY.remove(counter)
+    assert lines == ['fx_test_escape_total{name="x\\"1\\nfoo\\\\bar",pid="1"} 1']
+
+
+def test_unregistered_callback_outputs_are_unknown():
+    server = Flask(__name__)
+    metrics.install(server, load_config(), callbacks={'line-chart.figure': {}})
+
+    @server.route('/_dash-update-component', methods=['POST'])
+    def update():
+        return {}
+
+    client = server.test_client()
+    for output in ('line-chart.figure', 'x"1\nfoo', 'made-up.figure', ['not', 'a', 'string']):
+        client.post('/_dash-update-component', json={'output': output})
+    client.post('/_dash-update-component', data='not json', content_type='application/json')
+
+    callbacks = {key[0] for key in metrics.CALLBACK_SECONDS._values}
+    assert 'line-chart.figure' in callbacks
+    assert 'unknown' in callbacks
+    assert not callbacks & {'x"1\nfoo', 'made-up.figure'}
+    body = client.get('/metrics').get_data(as_text=True)
+    assert all(line.startswith(('#', 'fx_')) for line in body.splitlines())
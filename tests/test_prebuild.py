@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+import prebuild
+from config import load_config
+from rate_data import DataManager
+from rate_store import RateStore
+
+
+@pytest.fixture
+def config(tmp_path):
+    return load_config({'providers': ['synthetic'], 'symbols': ['EUR', 'GBP', 'JPY'],
+                        'history_days': 120, 'store_path': str(tmp_path), 'warm_up': False,
+                        'refresh_interval': 0, 'cache_url': ''})
+
+
+def test_small_batches_are_built_in_process(config, monkeypatch):
+    monkeypatch.setattr(prebuild, '_executor', lambda config: pytest.fail('started a pool'))
+    dataset = DataManager(config).get()
+    tasks = prebuild.chart_tasks(dataset, config)
+    built = dict(prebuild.build_figures(dataset, config, tasks))
+    assert list(built) == [key for key, _, _ in tasks]
+    assert all(payload.startswith('{') for payload in built.values())
+
+
+def test_first_load_does_not_wait_for_prepare(config):
+    release = threading.Event()
+    prepared = []
+
+    def prepare(dataset):
+        release.wait(5)
+        prepared.append(dataset.version)
+
+    manager = DataManager(config, prepare=prepare)
+    dataset = manager.get()
+    assert manager.ready and not prepared
+    release.set()
+    for thread in threading.enumerate():
+        if thread.name == 'rate-data-prepare':
+            thread.join(5)
+    assert prepared == [dataset.version]
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """Build on the pool whatever the task count, as on a host with several CPUs."""
+    monkeypatch.setattr(prebuild, '_cpus', lambda: 2)
+    yield
+    if prebuild._pool is not None:
+        prebuild._pool.shutdown(cancel_futures=True)
+        prebuild._pool = None
+
+
+def test_pool_builds_the_same_figures_as_the_process(config, pool):
+    dataset = DataManager(config).get()
+    tasks = prebuild.chart_tasks(dataset, config)
+    local = dict(prebuild.build_figures(dataset, {**config, 'prebuild_pool_min_tasks': len(tasks) + 1}, tasks))
+    assert prebuild._pool is None
+
+    pool_config = {**config, 'prebuild_workers': 2, 'prebuild_pool_min_tasks': 0}
+    assert dict(prebuild.build_figures(dataset, pool_config, tasks)) == local
+    started = prebuild._pool
+    assert started is not None
+
+    # The next version reuses the warm pool; each worker loads the new snapshot itself
+    store = RateStore(config['store_path'])
+    latest = store.load().tail(1)
+    store.merge(latest.assign(EUR=latest['EUR'] * 1.1))
+    refreshed = DataManager(config).get()
+    assert refreshed.version != dataset.version
+    tasks = prebuild.chart_tasks(refreshed, config)
+    local = dict(prebuild.build_figures(refreshed, {**config, 'prebuild_pool_min_tasks': len(tasks) + 1}, tasks))
+    assert dict(prebuild.build_figures(refreshed, pool_config, tasks)) == local
+    assert prebuild._pool is started
@@ -0,0 +1,43 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from providers import ProviderChain, ProviderError, RateProvider, SyntheticProvider
+
+SATURDAY, SUNDAY, MONDAY = date(2025, 1, 4), date(2025, 1, 5), date(2025, 1, 6)
+
+
+class Failing(RateProvider):
+    name = 'failing'
+
+    def __init__(self):
+        self.session = None
+        self.timeout = None
+
+    def fetch_range(self, start, end, base, symbols):
+        raise ProviderError('down')
+
+
+def test_weekend_is_an_empty_answer():
+    chain = ProviderChain([SyntheticProvider()])
+    rates = chain.fetch_range(SATURDAY, SUNDAY, 'USD', ['EUR'])
+    assert rates.empty
+    assert list(rates.columns) == ['Date', 'EUR']
+
+
+def test_empty_answer_wins_over_errors():
+    chain = ProviderChain([Failing(), SyntheticProvider()])
+    assert chain.fetch_range(SATURDAY, SUNDAY, 'USD', ['EUR']).empty
+
+
+def test_first_provider_with_rows_wins():
+    chain = ProviderChain([Failing(), SyntheticProvider(seed=1), SyntheticProvider(seed=2)])
+    rates = chain.fetch_range(SATURDAY, MONDAY, 'USD', ['EUR'])
+    expected = SyntheticProvider(seed=1).fetch_range(SATURDAY, MONDAY, 'USD', ['EUR'])
+    pd.testing.assert_frame_equal(rates, expected)
+
+
+def test_all_failing_raises():
+    with pytest.raises(ProviderError, match='failing: down'):
+        ProviderChain([Failing(), Failing()]).fetch_range(SATURDAY, MONDAY, 'USD', ['EUR'])
@@ -0,0 +1,85 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from rate_parser import stream_rates, stream_rates_file
+
+SYMBOLS = ['EUR', 'GBP', 'JPY']
+
+RATES = {
+    '2025-01-02': {'EUR': 0.9652, 'GBP': 0.8035, 'JPY': 157.2},
+    '2025-01-03': {'GBP': 0.8061, 'EUR': 0.9718, 'JPY': None},  # another order, a null
+    '2025-01-06': {'EUR': 0.9634, 'CHF': 0.91},  # a symbol not asked for, one missing
+}
+
+HEADER_FIRST = json.dumps({'amount': 1.0, 'base': 'USD', 'start_date': '2025-01-02',
+                           'end_date': '2025-01-06', 'rates': RATES}, indent=1)
+RATES_FIRST = json.dumps({'rates': RATES, 'amount': 1.0, 'base': 'USD'})
+
+
+def chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def expected():
+    return pd.DataFrame({'Date': pd.to_datetime(list(RATES)),
+                         'EUR': [0.9652, 0.9718, 0.9634],
+                         'GBP': [0.8035, 0.8061, np.nan],
+                         'JPY': [157.2, np.nan, np.nan]})
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 16, 64])
+@pytest.mark.parametrize('document, header', [
+    (HEADER_FIRST, {'amount': 1.0, 'base': 'USD', 'start_date': '2025-01-02', 'end_date': '2025-01-06'}),
+    (RATES_FIRST, {}),
+])
+def test_any_chunking_parses_the_same(document, header, size):
+    frame, parsed_header = stream_rates(chunked(document, size), SYMBOLS, '2025-01-02', '2025-01-06')
+    pd.testing.assert_frame_equal(frame, expected(), check_dtype=False)
+    assert parsed_header == header
+
+
+def test_bytes_split_inside_a_character():
+    document = json.dumps({'note': 'café', 'rates': RATES}, ensure_ascii=False).encode()
+    frame, header = stream_rates([document[i:i + 1] for i in range(len(document))], SYMBOLS)
+    assert header == {'note': 'café'}
+    assert len(frame) == 3
+
+
+def test_empty_rates():
+    frame, header = stream_rates(['{"base": "USD", "rates": {}}'], SYMBOLS)
+    assert frame.empty and list(frame.columns) == ['Date', *SYMBOLS]
+    assert header == {'base': 'USD'}
+
+
+def test_days_out_of_order_are_sorted_and_the_array_grows():
+    rates = {f'2025-01-{day:02d}': {'EUR': float(day)} for day in (5, 4, 3, 2, 1)}
+    frame, _ = stream_rates([json.dumps({'rates': rates})], ['EUR'], '2025-01-01', '2025-01-01')
+    assert list(frame['EUR']) == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+@pytest.mark.parametrize('document', [
+    HEADER_FIRST[:len(HEADER_FIRST) // 2],  # truncated inside the rates
+    '{"base": "USD"',  # no rates at all
+    '',
+    '{"rates": {"2025-01-02": [0.96]}}',  # a day that is not an object
+    '{"rates": {"2025-01-02": {"EUR": 0.96}, 2025}}',
+])
+def test_truncated_or_malformed_input(document):
+    with pytest.raises(ValueError):
+        stream_rates(chunked(document, 5), SYMBOLS)
+
+
+def test_nothing_after_the_rates_is_read():
+    frame, _ = stream_rates(['{"rates": {"2025-01-02": {"EUR": 0.96}}', ' not JSON'], SYMBOLS)
+    assert list(frame['EUR']) == [0.96]
+
+
+def test_stream_rates_file(tmp_path):
+    path = tmp_path / 'rates.json'
+    path.write_text(HEADER_FIRST)
+    frame, header = stream_rates_file(str(path), SYMBOLS, chunk_size=10)
+    pd.testing.assert_frame_equal(frame, expected(), check_dtype=False)
+    assert header['base'] == 'USD'
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+
+import pandas as pd
+
+from rate_store import RateStore
+
+FRIDAY, SATURDAY, MONDAY, TUESDAY = date(2025, 1, 3), date(2025, 1, 4), date(2025, 1, 6), date(2025, 1, 7)
+
+
+def frame(rows, provisional=False):
+    rates = pd.DataFrame({'Date': pd.to_datetime([day for day, _ in rows]),
+                          'EUR': [value for _, value in rows]})
+    rates.attrs['provisional'] = provisional
+    return rates
+
+
+def answer(rates):
+    """A fetch returning the rows of ``rates`` inside the requested range."""
+    def fetch(start, end):
+        inside = rates[(rates['Date'] >= pd.Timestamp(start)) & (rates['Date'] <= pd.Timestamp(end))]
+        inside.attrs = rates.attrs
+        return inside
+    return fetch
+
+
+def test_primary_rows_advance_synced_through(tmp_path):
+    store = RateStore(str(tmp_path))
+    store.update(answer(frame([(FRIDAY, 0.90)])), FRIDAY, FRIDAY)
+    assert store.synced_through() == FRIDAY
+
+
+def test_provisional_rows_do_not_advance_synced_through(tmp_path):
+    store = RateStore(str(tmp_path))
+    store.update(answer(frame([(FRIDAY, 0.90)])), FRIDAY, FRIDAY)
+    rates = store.update(answer(frame([(SATURDAY, 0.95), (MONDAY, 0.96)], provisional=True)), FRIDAY, MONDAY)
+    assert list(rates['EUR']) == [0.90, 0.95, 0.96]
+    assert store.synced_through() == FRIDAY
+
+
+def test_primary_replaces_provisional_rows(tmp_path):
+    store = RateStore(str(tmp_path))
+    store.update(answer(frame([(FRIDAY, 0.90)])), FRIDAY, FRIDAY)
+    store.update(answer(frame([(SATURDAY, 0.95), (MONDAY, 0.96)], provisional=True)), FRIDAY, MONDAY)
+
+    requested = []
+
+    def primary(start, end):
+        requested.append(start)
+        return answer(frame([(MONDAY, 0.91), (TUESDAY, 0.92)]))(start, end)
+
+    rates = store.update(primary, FRIDAY, TUESDAY)
+    assert requested == [FRIDAY + timedelta(days=1)]
+    # The weekend row the primary has no rate for is gone, Monday has the primary's value
+    assert list(rates['Date'].dt.date) == [FRIDAY, MONDAY, TUESDAY]
+    assert list(rates['EUR']) == [0.90, 0.91, 0.92]
+    assert store.synced_through() == TUESDAY
+
+
+def test_primary_without_rows_drops_provisional_rows(tmp_path):
+    store = RateStore(str(tmp_path))
+    store.update(answer(frame([(FRIDAY, 0.90)])), FRIDAY, FRIDAY)
+    store.update(answer(frame([(SATURDAY, 0.95)], provisional=True)), FRIDAY, SATURDAY)
+    rates = store.update(answer(frame([])), FRIDAY, SATURDAY)
+    assert list(rates['Date'].dt.date) == [FRIDAY]
+
+
+def test_provisional_first_load_is_fetched_again(tmp_path):
+    store = RateStore(str(tmp_path))
+    store.update(answer(frame([(FRIDAY, 0.95)], provisional=True)), FRIDAY, FRIDAY)
+    assert store.synced_through() == FRIDAY - timedelta(days=1)
+    rates = store.update(answer(frame([(FRIDAY, 0.90)])), FRIDAY, FRIDAY)
+    assert list(rates['EUR']) == [0.90]
+    assert store.synced_through() == FRIDAY
+
+
+def test_merge_blocks_matches_merging_one_block_at_a_time(tmp_path):
+    blocks = [
+        pd.DataFrame({'Date': pd.to_datetime([FRIDAY, MONDAY]), 'EUR': [0.91, float('nan')]}),
+        pd.DataFrame({'Date': pd.to_datetime([MONDAY, TUESDAY]), 'GBP': [0.80, 0.81], 'EUR': [0.97, 0.98]}),
+    ]
+    one_by_one, together = RateStore(str(tmp_path / 'one')), RateStore(str(tmp_path / 'all'))
+    for store in (one_by_one, together):
+        store.update(answer(frame([(FRIDAY, 0.90), (MONDAY, 0.96)])), FRIDAY, MONDAY)
+    for block in blocks:
+        one_by_one.merge(block)
+    together.merge_blocks([lambda block=block: block for block in blocks])
+
+    merged = together.load()
+    pd.testing.assert_frame_equal(merged, one_by_one.load())
+    assert list(merged.columns) == ['Date', 'EUR', 'GBP']
+    assert list(merged['EUR']) == [0.91, 0.97, 0.98]
+    assert together.synced_through() == MONDAY
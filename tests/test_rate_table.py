@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+from rate_matrix import RateMatrix, day_ordinals
+from rate_table import date_table, history_table, parse_filter, table_page
+
+
+@pytest.fixture
+def rates():
+    # Fri 2025-01-03, Mon 01-06, Tue 01-07, then Mon 2026-01-05
+    days = day_ordinals(['2025-01-03', '2025-01-06', '2025-01-07', '2026-01-05'])
+    values = np.array([[0.90, 1.30], [0.95, 1.20], [1.50, 1.10], [2.00, 1.00]])
+    return RateMatrix(days, values, ['EUR', 'SGD'])
+
+
+# Query strings as the DataTable filter UI emits them (filter_options defaults to {})
+@pytest.mark.parametrize('query, expected', [
+    ('{Rate} s> 0.9', [('Rate', 'gt', '0.9', True)]),
+    ('{Rate} s= 1.5', [('Rate', 'eq', '1.5', True)]),
+    ('{Rate} s<= 2', [('Rate', 'le', '2', True)]),
+    ('{Rate} s!= 2', [('Rate', 'ne', '2', True)]),
+    ('{Rate} >= 1', [('Rate', 'ge', '1', True)]),
+    ('{Rate} i< 1', [('Rate', 'lt', '1', False)]),
+    ('{Date} scontains 2025', [('Date', 'contains', '2025', True)]),
+    ('{Date} datestartswith 2025-01', [('Date', 'datestartswith', '2025-01', True)]),
+    ('{Currency} icontains "euro"', [('Currency', 'contains', 'euro', False)]),
+    ('{Code} seq EUR', [('Code', 'eq', 'EUR', True)]),
+    ('{Rate} s> 1 && {Date} scontains 2025', [('Rate', 'gt', '1', True), ('Date', 'contains', '2025', True)]),
+    ('{Rate} s>', []),
+    ('nonsense', []),
+    ('', []),
+    (None, []),
+])
+def test_parse_filter(query, expected):
+    assert parse_filter(query) == expected
+
+
+@pytest.mark.parametrize('query, dates', [
+    ('{Rate} s> 0.9', ['2026-01-05', '2025-01-07', '2025-01-06']),
+    ('{Rate} s= 1.5', ['2025-01-07']),
+    ('{Rate} s<= 0.95', ['2025-01-06', '2025-01-03']),
+    ('{Date} scontains 2025', ['2025-01-07', '2025-01-06', '2025-01-03']),
+    ('{Date} datestartswith 2026', ['2026-01-05']),
+    ('{Date} s>= 2025-01-06', ['2026-01-05', '2025-01-07', '2025-01-06']),
+    ('{Date} scontains 2025 && {Rate} s> 1', ['2025-01-07']),
+    ('{Change} s< 0', []),
+    ('{Missing} s> 1', ['2026-01-05', '2025-01-07', '2025-01-06', '2025-01-03']),
+])
+def test_history_filter(rates, query, dates):
+    records, _, _ = table_page(history_table(rates, 'EUR'), query, page_size=10)
+    assert [record['Date'] for record in records] == dates
+
+
+@pytest.mark.parametrize('query, codes', [
+    ('{Code} scontains EU', ['EUR']),
+    ('{Code} scontains eu', []),
+    ('{Code} icontains eu', ['EUR']),
+    ('{Currency} icontains "singapore"', ['SGD']),
+    ('{Rate} s< 1.5', ['SGD']),
+])
+def test_date_filter(rates, query, codes):
+    table, _ = date_table(rates, '2026-01-05')
+    records, _, _ = table_page(table, query, page_size=10)
+    assert [record['Code'] for record in records] == codes
+
+
+def test_date_table_is_as_of(rates):
+    # Sunday resolves to the Friday before it
+    table, day = date_table(rates, '2025-01-05')
+    assert day == '2025-01-03'
+    assert list(table['Rate']) == [0.90, 1.30]
+
+
+@pytest.mark.parametrize('sort_by, dates', [
+    # SGD falls every day: 1.30, 1.20, 1.10, 1.00
+    ([{'column_id': 'Rate', 'direction': 'asc'}], ['2026-01-05', '2025-01-07', '2025-01-06', '2025-01-03']),
+    ([{'column_id': 'Rate', 'direction': 'desc'}], ['2025-01-03', '2025-01-06', '2025-01-07', '2026-01-05']),
+    ([{'column_id': 'Date', 'direction': 'asc'}], ['2025-01-03', '2025-01-06', '2025-01-07', '2026-01-05']),
+    # The oldest day has no change: NaN sorts last either way
+    ([{'column_id': 'Change', 'direction': 'desc'}], ['2025-01-06', '2025-01-07', '2026-01-05', '2025-01-03']),
+    ([{'column_id': 'Change', 'direction': 'asc'}], ['2026-01-05', '2025-01-07', '2025-01-06', '2025-01-03']),
+])
+def test_sort(rates, sort_by, dates):
+    records, _, _ = table_page(history_table(rates, 'SGD'), sort_by=sort_by, page_size=10)
+    assert [record['Date'] for record in records] == dates
+
+
+def test_multi_column_sort(rates):
+    table = {'Code': np.array(['A', 'B', 'C', 'D'], dtype=object), 'Rate': np.array([2.0, 1.0, 2.0, 1.0])}
+    sort_by = [{'column_id': 'Rate', 'direction': 'asc'}, {'column_id': 'Code', 'direction': 'desc'}]
+    records, _, _ = table_page(table, sort_by=sort_by)
+    assert [record['Code'] for record in records] == ['D', 'B', 'C', 'A']
+
+
+@pytest.mark.parametrize('page_current, page_size, expected_page, page_count, dates', [
+    (0, 3, 0, 2, ['2026-01-05', '2025-01-07', '2025-01-06']),
+    (1, 3, 1, 2, ['2025-01-03']),
+    (5, 3, 1, 2, ['2025-01-03']),  # past the end: clamped to the last page
+    (-1, 3, 0, 2, ['2026-01-05', '2025-01-07', '2025-01-06']),
+    (None, 10, 0, 1, ['2026-01-05', '2025-01-07', '2025-01-06', '2025-01-03']),
+])
+def test_paging(rates, page_current, page_size, expected_page, page_count, dates):
+    records, page, count = table_page(history_table(rates, 'EUR'), page_current=page_current, page_size=page_size)
+    assert (page, count) == (expected_page, page_count)
+    assert [record['Date'] for record in records] == dates
+
+
+def test_paging_after_filter(rates):
+    records, page, count = table_page(history_table(rates, 'EUR'), '{Rate} s> 0.9', page_current=1, page_size=2)
+    assert (page, count) == (1, 2)
+    assert [record['Date'] for record in records] == ['2025-01-06']
+
+
+def test_records_are_json_ready(rates):
+    records, _, _ = table_page(history_table(rates, 'EUR'), page_size=10)
+    assert records[-1] == {'Date': '2025-01-03', 'Rate': 0.90, 'Change': None}
+    assert records[0]['Change'] == pytest.approx((2.00 / 1.50 - 1) * 100)
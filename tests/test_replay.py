@@ -0,0 +1,102 @@
+import pytest
+import requests
+from requests.adapters import BaseAdapter
+
+import replay
+from config import load_config
+from providers import make_session
+
+URL = 'https://api.frankfurter.app/2025-01-02..2025-01-03?from=USD&to=EUR'
+
+
+class Upstream(BaseAdapter):
+    """Stands in for the network while recording."""
+
+    def __init__(self):
+        super().__init__()
+        self.sends = 0
+
+    def send(self, request, **kwargs):
+        self.sends += 1
+        return replay._response(request, 200, {'Content-Type': 'application/json'}, '{"rates": {}}')
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fixtures(tmp_path):
+    store = replay.FixtureStore(str(tmp_path))
+    store.save(URL, 200, {'Content-Type': 'application/json'}, '{"rates": {"2025-01-02": {"EUR": 0.97}}}')
+    return store
+
+
+def session_for(fixtures, retries=3, **settings):
+    config = load_config({'replay_dir': fixtures.directory, 'fetch_retries': retries, **settings})
+    session = replay.install(make_session(retries=retries, backoff=0), config)
+    adapter = session.get_adapter('https://')
+    sends = []
+    replay_once = adapter._replay
+    adapter._replay = lambda request, timeout: sends.append(request.url) or replay_once(request, timeout)
+    return session, sends
+
+
+def test_replays_the_recorded_response(fixtures):
+    session, sends = session_for(fixtures)
+    response = session.get(URL)
+    assert response.status_code == 200
+    assert response.json()['rates']['2025-01-02']['EUR'] == 0.97
+    assert len(sends) == 1
+
+
+def test_dated_route_answers_other_dates(fixtures):
+    session, _ = session_for(fixtures)
+    response = session.get('https://api.frankfurter.app/2025-02-03..2025-02-04?to=EUR&from=USD')
+    assert response.json()['rates']['2025-01-02']['EUR'] == 0.97
+
+
+def test_missing_fixture_is_not_retried(fixtures):
+    session, sends = session_for(fixtures)
+    with pytest.raises(replay.MissingFixture):
+        session.get('https://open.er-api.com/v6/latest/USD')
+    assert len(sends) == 1
+
+
+def test_records_then_replays(tmp_path):
+    store = replay.FixtureStore(str(tmp_path))
+    upstream = Upstream()
+    session = requests.Session()
+    session.mount('https://', replay.ReplayAdapter(store, 'record', upstream=upstream))
+    assert session.get(URL).json() == {'rates': {}}
+    assert upstream.sends == 1 and len(store) == 1
+
+    replayed = requests.Session()
+    replayed.mount('https://', replay.ReplayAdapter(replay.FixtureStore(str(tmp_path))))
+    assert replayed.get(URL).json() == {'rates': {}}
+
+
+def test_injected_status_is_retried_like_a_real_one(fixtures):
+    session, sends = session_for(fixtures, replay_failure_rate=1.0, replay_failure_status=503)
+    with pytest.raises(requests.exceptions.RetryError):
+        session.get(URL)
+    assert len(sends) == 4  # the first try and fetch_retries=3 retries
+
+
+def test_injected_dropped_connection_is_retried(fixtures):
+    session, sends = session_for(fixtures, replay_failure_rate=1.0, replay_failure_status=0)
+    with pytest.raises(replay.InjectedFailure):
+        session.get(URL)
+    assert len(sends) == 4
+
+
+def test_some_failures_are_absorbed_by_the_retries(fixtures):
+    session, sends = session_for(fixtures, replay_failure_rate=0.5, replay_seed=1)
+    assert all(session.get(URL).status_code == 200 for _ in range(10))
+    assert len(sends) > 10
+
+
+def test_latency_over_the_timeout_is_a_read_timeout(fixtures):
+    session, sends = session_for(fixtures, retries=1, replay_latency_ms=50)
+    with pytest.raises(requests.exceptions.ReadTimeout):
+        session.get(URL, timeout=0.01)
+    assert len(sends) == 2
@@ -0,0 +1,132 @@
+import threading
+import time
+
+import pytest
+
+from shared_cache import RedisCache, SQLiteCache
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def make_cache(request, tmp_path):
+    """Factory of caches over one store, as each worker process opens its own."""
+    if request.param == 'sqlite':
+        path = str(tmp_path / 'cache.db')
+        return lambda max_bytes=1000: SQLiteCache(path, max_bytes=max_bytes)
+    server = fakeredis.FakeServer()
+    return lambda max_bytes=1000: RedisCache(fakeredis.FakeRedis(server=server), max_bytes=max_bytes)
+
+
+def stored_bytes(cache):
+    """Bytes the cache holds, checking its own accounting along the way."""
+    if isinstance(cache, SQLiteCache):
+        return cache._connect().execute('SELECT COALESCE(SUM(LENGTH(value)), 0) FROM entries').fetchone()[0]
+    client = cache.client
+    sizes = {key.decode(): int(size) for key, size in client.hgetall(cache._sizes).items()}
+    values = {key: client.get(cache.prefix + key) for key in sizes}
+    assert all(value is not None and len(value) == sizes[key] for key, value in values.items())
+    assert {key.decode() for key in client.zrange(cache._lru, 0, -1)} == set(sizes)
+    assert int(client.get(cache._total) or 0) == sum(sizes.values())
+    return sum(sizes.values())
+
+
+def test_least_recently_used_is_evicted(make_cache):
+    cache = make_cache(max_bytes=300)
+    for key in 'abc':
+        cache.set(key, key.encode() * 100)
+        time.sleep(0.01)
+    cache.get('a')  # now more recent than b and c
+    time.sleep(0.01)
+    cache.set('d', b'd' * 100)
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == [b'a' * 100, b'c' * 100, b'd' * 100]
+    assert stored_bytes(cache) == 300
+
+
+def test_replacing_a_value_keeps_the_byte_count(make_cache):
+    cache = make_cache(max_bytes=1000)
+    cache.set('a', b'x' * 400)
+    cache.set('a', b'y' * 100)
+    cache.set('b', b'z' * 500)
+    assert stored_bytes(cache) == 600
+    assert cache.get('a') == b'y' * 100
+
+
+def test_value_larger_than_the_bound_evicts_everything_else(make_cache):
+    cache = make_cache(max_bytes=100)
+    cache.set('a', b'a' * 60)
+    time.sleep(0.01)
+    cache.set('b', b'b' * 80)
+    assert cache.get('a') is None
+    assert stored_bytes(cache) <= 100
+
+
+def test_concurrent_misses_compute_once(make_cache):
+    calls = []
+    results = []
+    start = threading.Barrier(8)
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return b'v' * 200
+
+    def worker():
+        cache = make_cache(max_bytes=500)
+        start.wait()
+        results.append(cache.get_or_compute('figure', compute, lock_ttl=5, poll_interval=0.01))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(calls) == 1
+    assert results == [b'v' * 200] * 8
+
+    cache = make_cache(max_bytes=500)
+    for i in range(10):
+        cache.get_or_compute(f'other-{i}', lambda: b'o' * 200)
+    assert stored_bytes(cache) <= 500
+
+
+def test_lock_expires(make_cache):
+    first, second = make_cache(), make_cache()
+    assert first._acquire('k', 0.1)
+    assert not second._acquire('k', 0.1)
+    time.sleep(0.2)
+    assert second._acquire('k', 5)
+    # The expired holder must not release the lock it lost
+    first._release('k')
+    assert not first._acquire('k', 5)
+    second._release('k')
+    assert first._acquire('k', 5)
+
+
+def test_stuck_lock_holder_is_not_waited_on_forever(make_cache):
+    make_cache()._acquire('k', 60)
+    started = time.monotonic()
+    assert make_cache().get_or_compute('k', lambda: b'v', lock_ttl=0.2, poll_interval=0.01) == b'v'
+    assert time.monotonic() - started < 2
+
+
+def test_redis_release_does_not_delete_a_lock_taken_over_after_the_check(monkeypatch):
+    import redis.client
+
+    server = fakeredis.FakeServer()
+    first = RedisCache(fakeredis.FakeRedis(server=server))
+    second = RedisCache(fakeredis.FakeRedis(server=server))
+    assert first._acquire('k', 5)
+    multi = redis.client.Pipeline.multi
+
+    def expire_and_take_over(pipe):
+        # Between first's token check and its DEL, the lock expires and second takes it
+        second.client.delete(f'{second.prefix}lock:k')
+        assert second._acquire('k', 5)
+        return multi(pipe)
+
+    monkeypatch.setattr(redis.client.Pipeline, 'multi', expire_and_take_over)
+    first._release('k')
+    monkeypatch.undo()
+    assert not first._acquire('k', 5)